@@ -1,27 +1,33 @@
 from functools import wraps
+from http import HTTPStatus
+from typing import List
 from uuid import UUID
 
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count
 from django.http import HttpRequest
 from ninja import Router
 from ninja_crud.views import (
     CreateModelView,
     DeleteModelView,
-    ListModelView,
     ModelViewSet,
-    RetrieveModelView,
     UpdateModelView,
 )
 
+from config.ratelimit import rate_limit
+from core.colors import ColorIndex
+from core.exceptions import IncoherentInput
+from core.images import hex_to_lab
 from core.models.collections import Collection, Item
+from core.models.common import prefill_presigned_urls
 from core.schemas.collections import (
     CollectionInput,
     CollectionOutput,
     ItemInput,
     ItemOutput,
 )
-from core.schemas.common import OrderableQuery
+from core.schemas.common import NamedOrderableQuery
+from core.utils import presigned_urls_prefilled
+from core.views import KeysetListModelView, PlannedRetrieveModelView
 
 router = Router()
 
@@ -42,17 +48,18 @@ class CollectionViewSet(ModelViewSet):
     input_schema = CollectionInput
     output_schema = CollectionOutput
 
-    list = ListModelView(
+    list = KeysetListModelView(
         output_schema=output_schema,
-        filter_schema=OrderableQuery,
-        queryset_getter=lambda: Collection.objects.annotate(nb_items=Count("items")),
+        filter_schema=NamedOrderableQuery,
+        decorators=[presigned_urls_prefilled("creator")],
     )
     create = CreateModelView(
         input_schema=input_schema,
         output_schema=output_schema,
         pre_save=lambda request, instance: setattr(instance, "creator", request.user),
+        decorators=[rate_limit("create_collection")],
     )
-    retrieve = RetrieveModelView(output_schema=output_schema)
+    retrieve = PlannedRetrieveModelView(output_schema=output_schema)
     update = UpdateModelView(
         input_schema=input_schema,
         output_schema=output_schema,
@@ -60,11 +67,13 @@ class CollectionViewSet(ModelViewSet):
     )
     delete = DeleteModelView(decorators=[user_is_creator])
 
-    list_items = ListModelView(
+    list_items = KeysetListModelView(
         detail=True,
         related_model=Item,
         output_schema=ItemOutput,
+        filter_schema=NamedOrderableQuery,
         queryset_getter=lambda id: Item.objects.filter(collection_id=id),
+        decorators=[presigned_urls_prefilled()],
     )
     create_item = CreateModelView(
         detail=True,
@@ -72,8 +81,37 @@ class CollectionViewSet(ModelViewSet):
         input_schema=ItemInput,
         output_schema=ItemOutput,
         pre_save=lambda request, id, instance: setattr(instance, "collection_id", id),
-        decorators=[user_is_creator],
+        decorators=[rate_limit("create_collection_items"), user_is_creator],
     )
 
 
 CollectionViewSet.register_routes(router)
+
+
+@router.get(
+    path="/{id}/items/by-color",
+    url_name="search_collection_items_by_color",
+    response={HTTPStatus.OK: List[ItemOutput]},
+    operation_id="search_collection_items_by_color",
+)
+def search_collection_items_by_color(request, id: UUID, color: str, limit: int = 20):
+    """Items of the collection whose dominant color is the closest to `color`"""
+    try:
+        lab = hex_to_lab(color)
+    except ValueError:
+        raise IncoherentInput(detail={"color": "Expected an #rrggbb color"})
+    if not 0 < limit <= 100:
+        raise IncoherentInput(detail={"limit": "Expected between 1 and 100"})
+
+    index = ColorIndex.for_collection(id)
+    while True:
+        matches = index.search(lab, limit)
+        items = Item.objects.in_bulk([pk for _, pk in matches])
+        vanished = [("core.Item", pk) for _, pk in matches if pk not in items]
+        if not vanished:
+            break
+        # Deleted since indexed, searched again so that others take their place
+        index.discard(vanished)
+    items = [items[pk] for _, pk in matches]
+    prefill_presigned_urls(items, [])
+    return HTTPStatus.OK, items
@@ -3,20 +3,21 @@ from http import HTTPStatus
 from uuid import UUID
 
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count, Q
 from django.http import HttpRequest
 from ninja import Router
 from ninja_crud.views import (
     CreateModelView,
     DeleteModelView,
-    ListModelView,
     ModelViewSet,
-    RetrieveModelView,
     UpdateModelView,
 )
 
+from config.ratelimit import rate_limit
 from core.models.collections import Item, Snap
 from core.schemas.collections import ItemInput, ItemOutput, SnapInput, SnapOutput
+from core.schemas.common import OrderableQuery
+from core.utils import presigned_urls_prefilled
+from core.views import KeysetListModelView, PlannedRetrieveModelView
 
 router = Router()
 
@@ -37,7 +38,7 @@ class ItemViewSet(ModelViewSet):
     input_schema = ItemInput
     output_schema = ItemOutput
 
-    retrieve = RetrieveModelView(output_schema=output_schema)
+    retrieve = PlannedRetrieveModelView(output_schema=output_schema)
     update = UpdateModelView(
         input_schema=input_schema,
         output_schema=output_schema,
@@ -45,16 +46,13 @@ class ItemViewSet(ModelViewSet):
     )
     delete = DeleteModelView(decorators=[user_is_collection_creator])
 
-    list_snaps = ListModelView(
+    list_snaps = KeysetListModelView(
         detail=True,
         related_model=Snap,
         output_schema=SnapOutput,
-        queryset_getter=lambda id: Snap.objects.select_related("user")
-        .annotate(
-            nb_likes=Count("likes", filter=Q(likes__liked=True)),
-            nb_dislikes=Count("likes", filter=Q(likes__liked=False)),
-        )
-        .filter(item_id=id),
+        filter_schema=OrderableQuery,
+        queryset_getter=lambda id: Snap.objects.filter(item_id=id),
+        decorators=[presigned_urls_prefilled("user")],
     )
 
     @staticmethod
@@ -68,6 +66,7 @@ class ItemViewSet(ModelViewSet):
         input_schema=SnapInput,
         output_schema=SnapOutput,
         pre_save=pre_save_snap,
+        decorators=[rate_limit("create_item_snaps")],
     )
 
 
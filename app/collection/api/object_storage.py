@@ -1,9 +1,16 @@
+import mimetypes
+import time
 import uuid
 from http import HTTPStatus
 
-from ninja import Router
+from django.http import FileResponse
+from ninja import File, Form, Router
+from ninja.files import UploadedFile
 
 from config.external_client import s3_client
+from config.ratelimit import rate_limit
+from config.storage.local_client import LocalClient
+from core.exceptions import ForbiddenException, NotFoundException
 from core.schemas.common import ImageUploadInput, ImageUploadSchema
 
 router = Router()
@@ -15,6 +22,7 @@ router = Router()
     response={HTTPStatus.OK: ImageUploadSchema},
     operation_id="generate_upload_presigned_url",
 )
+@rate_limit("generate_upload_presigned_url")
 def generate_upload_presigned_url(request, payload: ImageUploadInput):
     object_name = f"{payload.id}/{uuid.uuid4()}-{payload.filename}"
 
@@ -23,3 +31,56 @@ def generate_upload_presigned_url(request, payload: ImageUploadInput):
     )
 
     return ImageUploadSchema(object_name=object_name, presigned_url=presigned_url)
+
+
+def get_local_client() -> LocalClient:
+    if not isinstance(s3_client, LocalClient):
+        raise NotFoundException("local object storage is disabled")
+    return s3_client
+
+
+@router.post(
+    path="/local",
+    url_name="upload_local_object",
+    response={HTTPStatus.NO_CONTENT: None},
+    operation_id="upload_local_object",
+    auth=None,
+)
+def upload_local_object(
+    request,
+    key: str = Form(...),
+    expires: int = Form(...),
+    signature: str = Form(...),
+    file: UploadedFile = File(...),
+):
+    """Target of the presigned post urls of the local object storage"""
+    client = get_local_client()
+    if not client.verify("POST", key, expires, signature):
+        raise ForbiddenException()
+
+    client.put_object(key, file)
+    return HTTPStatus.NO_CONTENT, None
+
+
+@router.get(
+    path="/local/{path:object_name}",
+    url_name="download_local_object",
+    operation_id="download_local_object",
+    auth=None,
+)
+def download_local_object(request, object_name: str, expires: int, signature: str):
+    """Target of the presigned urls of the local object storage"""
+    client = get_local_client()
+    if not client.verify("GET", object_name, expires, signature):
+        raise ForbiddenException()
+
+    try:
+        response = FileResponse(
+            client.open_object(object_name),
+            content_type=mimetypes.guess_type(object_name)[0],
+        )
+    except FileNotFoundError:
+        raise NotFoundException(object_name)
+    # Signed urls are stable until they expire, so are the bytes they point to
+    response["Cache-Control"] = f"public, max-age={expires - int(time.time())}"
+    return response
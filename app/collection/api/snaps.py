@@ -2,18 +2,17 @@ from functools import wraps
 from http import HTTPStatus
 from uuid import UUID
 
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count, Q
 from django.http import HttpRequest
 from ninja import Router
 from ninja_crud.views import (
     DeleteModelView,
-    ListModelView,
     ModelViewSet,
-    RetrieveModelView,
     UpdateModelView,
 )
 
+from core.likes import like_buffer
 from core.models.collections import Like, Snap
 from core.schemas.collections import (
     LikeInput,
@@ -23,6 +22,8 @@ from core.schemas.collections import (
     SnapOutput,
 )
 from core.schemas.common import OrderableQuery
+from core.utils import presigned_urls_prefilled
+from core.views import KeysetListModelView, PlannedRetrieveModelView
 
 router = Router()
 
@@ -43,17 +44,12 @@ class SnapViewSet(ModelViewSet):
     input_schema = SnapInput
     output_schema = SnapOutput
 
-    list = ListModelView(
+    list = KeysetListModelView(
         output_schema=output_schema,
         filter_schema=OrderableQuery,
-        queryset_getter=lambda id: Snap.objects.select_related("user")
-        .annotate(
-            nb_likes=Count("likes", filter=Q(likes__liked=True)),
-            nb_dislikes=Count("likes", filter=Q(likes__liked=False)),
-        )
-        .filter(item_id=id),
+        decorators=[presigned_urls_prefilled("user")],
     )
-    retrieve = RetrieveModelView(output_schema=output_schema)
+    retrieve = PlannedRetrieveModelView(output_schema=output_schema)
     update = UpdateModelView(
         input_schema=input_schema,
         output_schema=output_schema,
@@ -61,12 +57,13 @@ class SnapViewSet(ModelViewSet):
     )
     delete = DeleteModelView(decorators=[user_is_creator])
 
-    list_likes = ListModelView(
+    list_likes = KeysetListModelView(
         detail=True,
         related_model=Like,
         output_schema=LikeOutput,
         filter_schema=LikeQuery,
         queryset_getter=lambda id: Like.objects.filter(snap_id=id),
+        decorators=[presigned_urls_prefilled("user")],
     )
 
 
@@ -80,6 +77,8 @@ SnapViewSet.register_routes(router)
     operation_id="retrieve_my_like",
 )
 def retrieve_my_like(request: HttpRequest, id: UUID):
+    if settings.LIKE_WRITE_BEHIND:
+        return HTTPStatus.OK, like_buffer.get(id, request.user)
     like = Like.objects.get(snap_id=id, user=request.user)
     return HTTPStatus.OK, like
 
@@ -91,10 +90,9 @@ def retrieve_my_like(request: HttpRequest, id: UUID):
     operation_id="update_or_create_my_like",
 )
 def update_or_create_my_like(request: HttpRequest, id: UUID, payload: LikeInput):
-    like, _ = Like.objects.get_or_create(snap_id=id, user=request.user)
-    like.liked = payload.liked
-    like.save()
-    return HTTPStatus.OK, like
+    if settings.LIKE_WRITE_BEHIND:
+        return HTTPStatus.OK, like_buffer.vote(id, request.user, payload.liked)
+    return HTTPStatus.OK, Like.vote(id, request.user, payload.liked)
 
 
 @router.delete(
@@ -104,6 +102,9 @@ def update_or_create_my_like(request: HttpRequest, id: UUID, payload: LikeInput)
     operation_id="delete_my_like",
 )
 def delete_my_like(request: HttpRequest, id: UUID):
+    if settings.LIKE_WRITE_BEHIND:
+        like_buffer.delete(id, request.user)
+        return HTTPStatus.NO_CONTENT, None
     like = Like.objects.get(snap_id=id, user=request.user)
     like.delete()
     return HTTPStatus.NO_CONTENT, None
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+from http import HTTPStatus
 from typing import Union
 
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
 from ninja_crud.tests import (
     CreateModelViewTest,
     Credentials,
     DeleteModelViewTest,
-    ListModelViewTest,
     ModelViewSetTest,
     Payloads,
     RetrieveModelViewTest,
@@ -15,7 +17,10 @@ from ninja_crud.tests import (
 )
 
 from collection.api.collections import CollectionViewSet
-from core.tests.base import BaseTest
+from config.external_client import s3_client
+from core.models.collections import Collection, Item
+from core.tests.base import BaseTest, KeysetListModelViewTest
+from userauth.models import User
 
 
 class CollectionViewSetTest(ModelViewSetTest, BaseTest):
@@ -38,7 +43,7 @@ class CollectionViewSetTest(ModelViewSetTest, BaseTest):
         conflict={"name": "collection-2", "description": "description"},
     )
 
-    test_list = ListModelViewTest(
+    test_list = KeysetListModelViewTest(
         instance_getter=get_instance,
         credentials_getter=get_credentials_ok,
     )
@@ -74,7 +79,7 @@ class CollectionViewSetTest(ModelViewSetTest, BaseTest):
         },
     )
 
-    test_list_items = ListModelViewTest(
+    test_list_items = KeysetListModelViewTest(
         instance_getter=get_instance,
         credentials_getter=get_credentials_ok,
     )
@@ -83,3 +88,76 @@ class CollectionViewSetTest(ModelViewSetTest, BaseTest):
         instance_getter=get_instance,
         credentials_getter=get_credentials_ok_forbidden,
     )
+
+    def test_list_collections_presigned_urls_batched(self):
+        Collection.objects.update(object_name="collection-object-name")
+        User.objects.update(object_name="user-object-name")
+        s3_client.reset_mock()
+
+        response = self.client.get(reverse("api:collections"), **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        s3_client.generate_presigned_url.assert_not_called()
+        s3_client.generate_presigned_urls.assert_called_once()
+        for collection in response.json()["items"]:
+            self.assertEqual(collection["presigned_url"], "presigned_url")
+            self.assertEqual(collection["creator"]["presigned_url"], "presigned_url")
+
+    def test_list_items_keyset_pages(self):
+        url = reverse("api:collection_items", kwargs={"id": self.collection_1.id})
+        for index in range(5):
+            Item.objects.create(
+                collection=self.collection_1,
+                name=f"page-item-{index}",
+                description="description",
+                object_name="object_name",
+            )
+        # Rows sharing a created_at are told apart by their id
+        Item.objects.filter(collection=self.collection_1).update(
+            created_at=timezone.now()
+        )
+        expected = [
+            str(pk)
+            for pk in Item.objects.filter(collection=self.collection_1)
+            .order_by("-name", "-pk")
+            .values_list("pk", flat=True)
+        ]
+
+        listed, cursor = [], None
+        while True:
+            data = {"limit": 2, "order_by": "-name"}
+            if cursor is not None:
+                data["cursor"] = cursor
+            response = self.client.get(url, data, **self.auth_user_one)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            listed += [item["id"] for item in response.json()["items"]]
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(listed, expected)
+
+        for data in [
+            {"cursor": "not-a-cursor"},
+            {"order_by": "name", "cursor": cursor or "e30"},
+            {"limit": 1000},
+            {"order_by": "description"},
+        ]:
+            with self.subTest(data=data):
+                response = self.client.get(url, data, **self.auth_user_one)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_list_collections_constant_queries(self):
+        def add_rows():
+            for index in range(5):
+                creator = User.objects.create_user(
+                    username=f"creator-{index}",
+                    email=f"creator-{index}@email.com",
+                    password="password",
+                )
+                Collection.objects.create(
+                    name=f"collection-{index + 10}",
+                    description="description",
+                    creator=creator,
+                )
+
+        self.assertListQueriesConstant(reverse("api:collections"), add_rows)
@@ -9,7 +9,6 @@ from ninja_crud.tests import (
     CreateModelViewTest,
     Credentials,
     DeleteModelViewTest,
-    ListModelViewTest,
     ModelViewSetTest,
     Payloads,
     RetrieveModelViewTest,
@@ -19,7 +18,7 @@ from ninja_crud.tests import (
 from collection.api.items import ItemViewSet
 from core.models.collections import Item
 from core.schemas.collections import SnapOutput
-from core.tests.base import BaseTest
+from core.tests.base import BaseTest, KeysetListModelViewTest
 
 
 class ItemViewSetTest(ModelViewSetTest, BaseTest):
@@ -73,7 +72,7 @@ class ItemViewSetTest(ModelViewSetTest, BaseTest):
         bad_request={"comment": "comment"},
     )
 
-    test_list_snaps = ListModelViewTest(
+    test_list_snaps = KeysetListModelViewTest(
         instance_getter=get_instance,
         credentials_getter=get_credentials_ok,
     )
@@ -1,7 +1,28 @@
+import os
+import tempfile
+from datetime import datetime, timezone
 from http import HTTPStatus
+from unittest.mock import ANY, Mock, patch
+from urllib.parse import quote
 
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
 from django.urls import reverse
+from django_redis import get_redis_connection
+from google.api_core.exceptions import GoogleAPIError
+from google.auth import crypt
+from google.cloud import storage
+from google.cloud.storage._signing import generate_signed_url_v4
+from google.oauth2 import service_account
 
+from config.metrics import metrics
+from config.storage.async_client import AsyncClient
+from config.storage.google_client import GoogleClient
+from config.storage.local_client import LocalClient
+from config.storage.signer import V4UrlSigner
 from core.tests.base import BaseTest
 
 
@@ -28,3 +49,229 @@ class ObjectStorageViewSetTest(BaseTest):
         content = response.json()
         self.assertIsNotNone(content["object_name"])
         self.assertIsNotNone(content["presigned_url"])
+
+
+def make_credentials() -> service_account.Credentials:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return service_account.Credentials(
+        signer=crypt.RSASigner.from_string(pem),
+        service_account_email="poukidex@project.iam.gserviceaccount.com",
+        token_uri="https://oauth2.googleapis.com/token",
+        project_id="project",
+    )
+
+
+class GoogleClientTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.credentials = make_credentials()
+
+    def setUp(self):
+        metrics.reset()
+        patcher = patch.object(
+            service_account.Credentials,
+            "from_service_account_file",
+            return_value=self.credentials,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(storage, "Client")
+        self.storage_client = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.client = GoogleClient(secret_json_path="secrets.json", bucket_name="b")
+        cache.clear()
+
+    def test_bucket_resolved_once(self):
+        self.client.delete_object("object-1")
+        self.client.delete_object("object-2")
+        self.client.copy_object("object-1", "object-2")
+
+        self.storage_client.get_bucket.assert_called_once_with("b")
+
+    def test_bucket_refreshed_on_failure(self):
+        bucket = self.storage_client.get_bucket.return_value
+        bucket.get_blob.side_effect = [GoogleAPIError(), Mock()]
+
+        self.client.delete_object("object-1")
+
+        self.assertEqual(self.storage_client.get_bucket.call_count, 2)
+        self.assertEqual(bucket.get_blob.call_count, 2)
+
+    def test_generate_presigned_urls_signs_misses_only(self):
+        cache.set("s3_presigned_url:object-1", "cached_url")
+
+        with patch.object(
+            self.client.signer, "sign_many", return_value={"object-2": "signed_url"}
+        ) as sign_many:
+            presigned_urls = self.client.generate_presigned_urls(
+                ["object-1", "object-2"]
+            )
+
+        self.assertEqual(
+            presigned_urls, {"object-1": "cached_url", "object-2": "signed_url"}
+        )
+        sign_many.assert_called_once_with(["object-2"], 7200, signed_at=ANY)
+        self.storage_client.get_bucket.assert_not_called()
+        self.assertEqual(cache.get("s3_presigned_url:object-2"), "signed_url")
+
+    def test_object_read_in_chunks(self):
+        blob = self.storage_client.get_bucket.return_value.blob
+
+        self.client.open_object("object-1", chunk_size=1024)
+        self.client.get_object_range("object-1", 0, 1024)
+
+        blob.return_value.open.assert_called_once_with("rb", chunk_size=1024)
+        blob.return_value.download_as_bytes.assert_called_once_with(start=0, end=1023)
+
+    @patch("config.storage.google_client.time.time")
+    def test_presigned_url_stable_within_expiry_bucket(self, time_mock):
+        time_mock.return_value = 7200 + 1800
+        presigned_url = self.client.generate_presigned_url("object-1")
+
+        self.assertIn("X-Goog-Date=19700101T020000Z", presigned_url)
+        self.assertIn("X-Goog-Expires=7200", presigned_url)
+        self.assertEqual(cache.ttl("s3_presigned_url:object-1"), 1800)
+
+        cache.clear()
+        self.client.presigned_urls.clear()
+        time_mock.return_value = 7200 + 3000
+        self.assertEqual(self.client.generate_presigned_url("object-1"), presigned_url)
+
+        cache.clear()
+        self.client.presigned_urls.clear()
+        time_mock.return_value = 7200 + 3600
+        self.assertNotEqual(
+            self.client.generate_presigned_url("object-1"), presigned_url
+        )
+
+    def test_presigned_url_served_from_local_cache(self):
+        presigned_url = self.client.generate_presigned_url("object-1")
+
+        with patch.object(cache, "get_many") as get_many:
+            self.assertEqual(
+                self.client.generate_presigned_url("object-1"), presigned_url
+            )
+        get_many.assert_not_called()
+        self.assertEqual(metrics.hit_ratios()["presigned_url_local"], 0.5)
+
+    def test_presigned_url_signed_by_one_worker_only(self):
+        get_redis_connection("default").set("s3_presigned_url_lock:object-1", 1)
+
+        def sign_elsewhere(seconds):
+            cache.set("s3_presigned_url:object-1", "signed_elsewhere")
+
+        with patch.object(self.client.signer, "sign_many") as sign_many, patch(
+            "config.storage.google_client.time.sleep", side_effect=sign_elsewhere
+        ):
+            presigned_url = self.client.generate_presigned_url("object-1")
+
+        self.assertEqual(presigned_url, "signed_elsewhere")
+        sign_many.assert_not_called()
+
+
+class LocalClientTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = LocalClient(
+            root=directory.name,
+            base_url="http://testserver/api/object-storage/local",
+            secret_key="secret",
+        )
+        patcher = patch("collection.api.object_storage.s3_client", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_objects_lifecycle(self):
+        self.storage.put_object("snaps/object-1.png", b"image")
+        self.assertEqual(self.storage.get_object("snaps/object-1.png")[:], b"image")
+
+        self.storage.copy_object("snaps/object-1.png", "snaps/object-2.png")
+        self.assertTrue(
+            os.path.samefile(
+                self.storage.path("snaps/object-1.png"),
+                self.storage.path("snaps/object-2.png"),
+            )
+        )
+
+        self.assertEqual(
+            list(self.storage.iter_object("snaps/object-1.png", chunk_size=2)),
+            [b"im", b"ag", b"e"],
+        )
+        self.assertEqual(
+            self.storage.get_object_range("snaps/object-1.png", 1, 3), b"ma"
+        )
+
+        self.storage.delete_object("snaps/object-1.png")
+        self.assertEqual(self.storage.get_object("snaps/object-2.png")[:], b"image")
+        with self.assertRaises(FileNotFoundError):
+            self.storage.get_object("snaps/object-1.png")
+        with self.assertRaises(FileNotFoundError):
+            self.storage.get_object("../object-1.png")
+
+    def test_upload_and_download_presigned_urls(self):
+        presigned_post = self.storage.generate_presigned_post_url(
+            "snaps/object-1.png", "image/png"
+        )
+        response = self.client.post(
+            presigned_post["url"],
+            data={
+                **presigned_post["fields"],
+                "file": SimpleUploadedFile("object-1.png", b"image"),
+            },
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+
+        presigned_url = self.storage.generate_presigned_url("snaps/object-1.png")
+        response = self.client.get(presigned_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(b"".join(response.streaming_content), b"image")
+
+        response = self.client.get(presigned_url.replace("signature=", "signature=0"))
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    async def test_async_client(self):
+        self.storage.put_object("snaps/object-1.png", b"image")
+        async_client = AsyncClient(self.storage, max_workers=4)
+        async_client.sign_batch_size = 1
+
+        await async_client.copy_objects({"snaps/object-1.png": "snaps/object-2.png"})
+        chunks = [
+            chunk async for chunk in async_client.iter_object("snaps/object-2.png", 2)
+        ]
+        presigned_urls = await async_client.generate_presigned_urls(
+            ["snaps/object-1.png", "snaps/object-2.png"]
+        )
+        await async_client.delete_objects(["snaps/object-1.png", "snaps/object-2.png"])
+
+        self.assertEqual(chunks, [b"im", b"ag", b"e"])
+        self.assertEqual(
+            presigned_urls,
+            self.storage.generate_presigned_urls(
+                ["snaps/object-1.png", "snaps/object-2.png"]
+            ),
+        )
+        self.assertEqual(os.listdir(self.storage.path("snaps")), [])
+
+
+class V4UrlSignerTest(TestCase):
+    def test_sign_matches_google_cloud_storage(self):
+        credentials = make_credentials()
+        signer = V4UrlSigner(credentials, "bucket")
+        signed_at = datetime(2023, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+        for object_name in ["snaps/1/image.png", "a file~with spaces+é.png"]:
+            expected = generate_signed_url_v4(
+                credentials,
+                resource=f"/bucket/{quote(object_name, safe='/~')}",
+                expiration=600,
+                _request_timestamp=signed_at.strftime("%Y%m%dT%H%M%SZ"),
+            )
+            self.assertEqual(signer.sign(object_name, 600, signed_at), expected)
@@ -1,23 +1,30 @@
 from __future__ import annotations
 
+import io
+import tempfile
 from http import HTTPStatus
 from typing import Union
+from unittest.mock import patch
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from ninja_crud.tests import (
     Credentials,
     DeleteModelViewTest,
-    ListModelViewTest,
     ModelViewSetTest,
     Payloads,
     RetrieveModelViewTest,
     UpdateModelViewTest,
 )
+from PIL import Image
 
 from collection.api.snaps import SnapViewSet
+from config.storage.local_client import LocalClient
 from core.models.collections import Item, Like, Snap
-from core.tests.base import BaseTest
+from core.models.common import StoredObject
+from core.tests.base import BaseTest, KeysetListModelViewTest
+from userauth.models import User
 
 
 class SnapViewSetTest(ModelViewSetTest, BaseTest):
@@ -69,11 +76,20 @@ class SnapViewSetTest(ModelViewSetTest, BaseTest):
         instance_getter=get_instance, credentials_getter=get_credentials_ok_forbidden
     )
 
-    test_list_likes = ListModelViewTest(
+    test_list_likes = KeysetListModelViewTest(
         instance_getter=get_instance,
         credentials_getter=get_credentials_ok,
     )
 
+    def test_list_likes_constant_queries(self):
+        def add_rows():
+            for user in [self.user_two, self.user_three]:
+                Like.objects.create(snap=self.snap, user=user, liked=False)
+
+        self.assertListQueriesConstant(
+            reverse("api:snap_likes", kwargs={"id": self.snap.id}), add_rows
+        )
+
     def test_retrieve_my_like_ok(self):
         kwargs = {"id": self.snap.id}
         response = self.client.get(
@@ -118,9 +134,166 @@ class SnapViewSetTest(ModelViewSetTest, BaseTest):
         self.assertEqual(content["liked"], like.liked)
         self.assertEqual(content["user"]["id"], str(like.user.id))
 
+    def test_create_my_like_unknown_snap(self):
+        kwargs = {"id": "00000000-0000-0000-0000-000000000000"}
+        response = self.client.put(
+            reverse("api:snap_like", kwargs=kwargs),
+            data={"liked": True},
+            content_type="application/json",
+            **self.auth_user_one,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
     def test_delete_my_like_ok(self):
         kwargs = {"id": self.snap.id}
         response = self.client.delete(
             reverse("api:snap_like", kwargs=kwargs), **self.auth_user_one
         )
         self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+
+    def make_storage(self) -> LocalClient:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage = LocalClient(directory.name, "http://testserver", "secret")
+        image = io.BytesIO()
+        Image.new("RGB", (1024, 768), "red").save(image, "PNG")
+        storage.put_object("snaps/new.png", image.getvalue())
+        return storage
+
+    def test_update_processes_image(self):
+        storage = self.make_storage()
+
+        with patch("core.tasks.s3_client", storage), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            response = self.client.put(
+                f"/api/snaps/{self.snap.id}",
+                data={"comment": "comment", "object_name": "snaps/new.png"},
+                content_type="application/json",
+                **self.auth_user_one,
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        self.snap.refresh_from_db()
+        # Moved under the hash of its content
+        object_name = StoredObject.objects.get().object_name
+        self.assertEqual(self.snap.object_name, object_name)
+        self.assertFalse(storage.path("snaps/new.png").exists())
+        self.assertEqual(
+            self.snap.derivatives,
+            {
+                "thumbnail": f"{object_name}.thumbnail.webp",
+                "medium": f"{object_name}.medium.webp",
+            },
+        )
+        self.assertEqual(self.snap.dominant_colors["dominant"], "#ff0000")
+        thumbnail = Image.open(storage.open_object(f"{object_name}.thumbnail.webp"))
+        self.assertEqual((thumbnail.format, thumbnail.size), ("WEBP", (128, 96)))
+
+        response = self.client.get(f"/api/snaps/{self.snap.id}", **self.auth_user_one)
+        self.assertEqual(
+            response.json()["derivative_urls"],
+            {"thumbnail": "presigned_url", "medium": "presigned_url"},
+        )
+
+    def test_update_with_interned_upload_name(self):
+        storage = self.make_storage()
+
+        with patch("core.tasks.s3_client", storage), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            response = self.client.post(
+                f"/api/items/{self.snap.item_id}/snaps",
+                data={"comment": "comment", "object_name": "snaps/new.png"},
+                content_type="application/json",
+                **self.auth_user_two,
+            )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        snap = Snap.objects.get(pk=response.json()["id"])
+        stored = StoredObject.objects.get()
+        self.assertEqual(snap.object_name, stored.object_name)
+
+        # Echoes the upload name of the create response, deleted since
+        with patch("core.tasks.s3_client", storage), self.captureOnCommitCallbacks(
+            execute=True
+        ) as callbacks:
+            response = self.client.put(
+                f"/api/snaps/{snap.id}",
+                data={"comment": "edited", "object_name": "snaps/new.png"},
+                content_type="application/json",
+                **self.auth_user_two,
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()["object_name"], stored.object_name)
+        self.assertEqual(callbacks, [])
+
+        updated = Snap.objects.get(pk=snap.pk)
+        self.assertEqual(updated.comment, "edited")
+        self.assertEqual(updated.object_name, stored.object_name)
+        self.assertEqual(updated.derivatives, snap.derivatives)
+        self.assertEqual(updated.perceptual_hash, snap.perceptual_hash)
+        self.assertEqual(StoredObject.objects.get().ref_count, 1)
+
+    def test_backfill_dominant_colors(self):
+        Snap.objects.filter(pk=self.snap.pk).update(object_name="snaps/new.png")
+
+        with patch("core.tasks.s3_client", self.make_storage()), self.assertLogs(
+            "core.tasks", "WARNING"
+        ):
+            call_command("backfill_dominant_colors", "--sync", stdout=io.StringIO())
+
+        self.snap.refresh_from_db()
+        self.assertEqual(
+            self.snap.dominant_colors,
+            {
+                "platform": "server",
+                "dominant": "#ff0000",
+                "colors": [{"color": "#ff0000", "share": 1.0}],
+            },
+        )
+
+    def test_counters(self):
+        item = self.snap.item
+        self.assertEqual(Item.objects.get(pk=item.pk).nb_snaps, 1)
+        self.assertEqual(Snap.objects.get(pk=self.snap.pk).nb_likes, 1)
+
+        url = reverse("api:snap_like", kwargs={"id": self.snap.id})
+        for liked in [False, False, True, False]:
+            self.client.put(
+                url,
+                data={"liked": liked},
+                content_type="application/json",
+                **self.auth_user_two,
+            )
+        self.client.delete(url, **self.auth_user_one)
+        response = self.client.get(
+            reverse("api:snap", kwargs={"id": self.snap.id}), **self.auth_user_one
+        )
+        self.assertEqual(
+            (response.json()["nb_likes"], response.json()["nb_dislikes"]), (0, 1)
+        )
+
+        # Bulk writes skip the counters until reconciled
+        Like.objects.filter(snap=self.snap).update(liked=True)
+        stdout = io.StringIO()
+        call_command("reconcile_counters", stdout=stdout)
+        self.assertIn("Snap.nb_likes: 1 rows fixed", stdout.getvalue())
+        self.assertEqual(
+            Snap.objects.values_list("nb_likes", "nb_dislikes").get(pk=self.snap.pk),
+            (1, 0),
+        )
+
+        self.snap.delete()
+        self.assertEqual(Item.objects.get(pk=item.pk).nb_snaps, 0)
+
+    def test_delete_snap_queries_constant(self):
+        users = User.objects.bulk_create(
+            User(username=f"liker-{i}", email=f"liker-{i}@picsellia.com")
+            for i in range(10)
+        )
+        Like.objects.bulk_create(Like(snap=self.snap, user=user) for user in users)
+
+        # Likes are deleted in bulk, their counter goes with the snap
+        with self.assertNumQueries(4):
+            self.snap.delete()
+        self.assertEqual(Item.objects.get(pk=self.snap.item_id).nb_snaps, 0)
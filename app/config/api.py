@@ -15,8 +15,9 @@ from collection.api.items import router as items_router
 from collection.api.object_storage import router as object_storage_router
 from collection.api.snaps import router as snaps_router
 from config.authentication import AccessTokenBearer
+from config.metrics import metrics
 from config.renderer import ORJSONRenderer
-from core.exceptions import PoukidexException
+from core.exceptions import ForbiddenException, PoukidexException
 from userauth.api.auth import router as auth_router
 from userauth.api.users import router as users_router
 
@@ -35,6 +36,20 @@ api.add_router("auth", auth_router, tags=["auth"])
 api.add_router("users", users_router, tags=["user"])
 
 
+@api.get(
+    "/metrics",
+    response={HTTPStatus.OK: dict},
+    url_name="metrics",
+    operation_id="retrieve_metrics",
+    tags=["metrics"],
+)
+def retrieve_metrics(request):
+    """Counters and timings of the worker that handles the request"""
+    if not request.user.is_staff:
+        raise ForbiddenException()
+    return HTTPStatus.OK, metrics.snapshot()
+
+
 @api.exception_handler(PoukidexException)
 def api_handler_poukidex_exception(request, exc: PoukidexException):
     if exc.status in [HTTPStatus.INTERNAL_SERVER_ERROR]:
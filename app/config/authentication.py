@@ -1,30 +1,204 @@
+import hashlib
 import logging
+import pickle
+import time
 from abc import ABC
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable
+from uuid import UUID
 
 import jwt
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.http import HttpRequest
 from ninja.security import HttpBearer
+
+from config.cache import LocalCache
 from userauth.models import Token, User
 
 logger = logging.getLogger(__name__)
 
 
+class AuthenticatedUserCache:
+    """
+    Two-tier user cache, by id token or by id: a short-lived in-process LRU in front
+    of Redis.
+
+    The local tier cannot be invalidated across workers, so its timeout bounds how
+    long a revoked token may still be accepted by another worker.
+    """
+
+    key_prefix = "auth_user"
+
+    def __init__(self):
+        self.local = LocalCache(
+            max_size=settings.AUTH_LOCAL_CACHE_SIZE,
+            timeout=settings.AUTH_LOCAL_CACHE_TIMEOUT,
+            name="auth_user_cache",
+        )
+
+    def _get(self, key: str, loader: Callable[[], User | None]) -> User | None:
+        # Local entries are pickled so that every request works on its own instance
+        payload = self.local.get(key)
+        if payload is not None:
+            return pickle.loads(payload)
+
+        user = cache.get(key)
+        if user is None:
+            user = loader()
+            if user is None:
+                return None
+            cache.set(key, user, settings.AUTH_CACHE_TIMEOUT)
+
+        self.local.set(key, pickle.dumps(user))
+        return user
+
+    def _token_key(self, id_token: str) -> str:
+        return f"{self.key_prefix}:token:{id_token}"
+
+    def _id_key(self, user_id: UUID | str) -> str:
+        return f"{self.key_prefix}:id:{user_id}"
+
+    def get_user(self, id_token: str) -> User | None:
+        return self._get(
+            self._token_key(id_token),
+            lambda: User.objects.select_related("auth_token")
+            .filter(auth_token__key=id_token)
+            .first(),
+        )
+
+    def get_user_by_id(self, user_id: UUID | str) -> User | None:
+        return self._get(
+            self._id_key(user_id),
+            lambda: User.objects.select_related("auth_token")
+            .filter(pk=user_id)
+            .first(),
+        )
+
+    def invalidate(self, user: User, id_token: str | None = None):
+        """Drops the cached copies of the user, under any of its tokens if not given"""
+        if id_token is None:
+            self.invalidate_many([user.pk])
+            return
+        self._delete([self._token_key(id_token), self._id_key(user.pk)])
+
+    def invalidate_many(
+        self, user_ids: Iterable[UUID | str], id_tokens: Iterable[str] = ()
+    ):
+        """
+        Drops the cached copies of the users, under their current tokens and the
+        given ones, e.g. deleted tokens
+        """
+        user_ids = list(user_ids)
+        id_tokens = {
+            *id_tokens,
+            *Token.objects.filter(user_id__in=user_ids).values_list("key", flat=True),
+        }
+        self._delete(
+            [
+                *(self._id_key(user_id) for user_id in user_ids),
+                *(self._token_key(id_token) for id_token in id_tokens),
+            ]
+        )
+
+    def _delete(self, keys: list[str]):
+        for key in keys:
+            self.local.delete(key)
+        cache.delete_many(keys)
+
+
+user_cache = AuthenticatedUserCache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance: User, **kwargs):
+    user_cache.invalidate_many([instance.pk])
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance: Token, **kwargs):
+    user_cache.invalidate_many([instance.user_id], id_tokens=[instance.key])
+
+
+class TokenEpochStore:
+    """
+    Per-user revocation counter embedded in stateless access tokens.
+
+    Postgres holds the source of truth, Redis the copy read on every request.
+    """
+
+    key_prefix = "auth_token_epoch"
+
+    def _cache_key(self, user_id: UUID | str) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    def get(self, user_id: UUID | str) -> int | None:
+        epoch = cache.get(self._cache_key(user_id))
+        if epoch is None:
+            epoch = (
+                User.objects.filter(pk=user_id)
+                .values_list("token_epoch", flat=True)
+                .first()
+            )
+            if epoch is None:
+                return None
+            cache.set(self._cache_key(user_id), epoch, settings.AUTH_CACHE_TIMEOUT)
+        return epoch
+
+    def bump(self, user: User):
+        """Revoke every stateless access token issued so far to this user"""
+        User.objects.filter(pk=user.pk).update(token_epoch=F("token_epoch") + 1)
+        user.refresh_from_db(fields=["token_epoch"])
+        cache.set(
+            self._cache_key(user.pk), user.token_epoch, settings.AUTH_CACHE_TIMEOUT
+        )
+
+
+token_epochs = TokenEpochStore()
+
+
 class AbstractTokenBearer(HttpBearer, ABC):
     @staticmethod
     def _authenticate(request: HttpRequest, id_token: str) -> bool:
-        if Token.objects.filter(key=id_token).exists():
-            request.user = User.objects.get(auth_token__key=id_token)
-            return True
-        else:
+        if not id_token:
+            return False
+
+        user = user_cache.get_user(id_token)
+        if user is None:
             return False
 
+        request.user = user
+        return True
+
 
 class AccessTokenBearer(AbstractTokenBearer):
     def authenticate(self, request: HttpRequest, token: str) -> bool:
-        id_token = JWTCoder.decode(access_token=token)
-        return self._authenticate(request, id_token=id_token)
+        claims = JWTCoder.decode_claims(access_token=token)
+        if claims is None:
+            return False
+
+        if settings.JWT_STATELESS and "sub" in claims:
+            return self._authenticate_stateless(request, claims)
+        return self._authenticate(request, id_token=claims.get("id_token"))
+
+    @staticmethod
+    def _authenticate_stateless(request: HttpRequest, claims: dict) -> bool:
+        user_id = claims["sub"]
+        if claims.get("epoch") != token_epochs.get(user_id):
+            return False
+
+        # Deleted users may keep a cached epoch
+        user = user_cache.get_user_by_id(user_id)
+        if user is None:
+            return False
+
+        request.user = user
+        return True
 
 
 class IDTokenBearer(AbstractTokenBearer):
@@ -33,27 +207,45 @@ class IDTokenBearer(AbstractTokenBearer):
 
 
 class JWTCoder:
+    # Verified claims by token digest, kept until the token expires
+    verified_tokens = LocalCache(
+        max_size=settings.JWT_CACHE_SIZE,
+        timeout=float(settings.JWT_EXPIRES_IN),
+        name="jwt_cache",
+    )
+
     @classmethod
-    def encode(cls, id_token: str) -> str | None:
+    def encode(cls, id_token: str, user: User | None = None) -> str | None:
         delta = float(settings.JWT_EXPIRES_IN)
         expires_in = datetime.now(tz=timezone.utc) + timedelta(seconds=delta)
+        payload = {"id_token": id_token, "exp": expires_in}
+        if settings.JWT_STATELESS and user is not None:
+            payload["sub"] = str(user.pk)
+            payload["epoch"] = token_epochs.get(user.pk)
         try:
-            return jwt.encode(
-                {"id_token": id_token, "exp": expires_in},
-                settings.JWT_KEY,
-                algorithm="HS256",
-            )
+            return jwt.encode(payload, settings.JWT_KEY, algorithm="HS256")
         except jwt.PyJWTError:  # pragma: no cover
             logger.exception("JWT error")
             return None
 
     @classmethod
-    def decode(cls, access_token: str) -> str | None:
+    def decode_claims(cls, access_token: str) -> dict | None:
+        digest = hashlib.sha256(access_token.encode()).digest()
+        claims = cls.verified_tokens.get(digest)
+        if claims is not None:
+            return dict(claims)
+
+        claims = cls._verify(access_token)
+        if claims is not None and "exp" in claims:
+            cls.verified_tokens.set(digest, claims, timeout=claims["exp"] - time.time())
+        return claims
+
+    @classmethod
+    def _verify(cls, access_token: str) -> dict | None:
         try:
-            payload = jwt.decode(
+            return jwt.decode(
                 jwt=access_token, key=settings.JWT_KEY, algorithms=["HS256"]
             )
-            return payload.get("id_token", None)
         except jwt.exceptions.ExpiredSignatureError:  # pragma: no cover
             logger.info("JWT expired")
         except jwt.exceptions.DecodeError:  # pragma: no cover
@@ -62,3 +254,10 @@ class JWTCoder:
             logger.exception("JWT error")
 
         return None
+
+    @classmethod
+    def decode(cls, access_token: str) -> str | None:
+        claims = cls.decode_claims(access_token)
+        if claims is None:
+            return None
+        return claims.get("id_token", None)
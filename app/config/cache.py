@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from config.metrics import metrics
+
+
+class LocalCache:
+    """
+    Thread-safe, size-bounded in-process LRU cache whose entries expire after a TTL.
+
+    When named, hits and misses are counted as `<name>.hit` and `<name>.miss`.
+    """
+
+    def __init__(self, max_size: int, timeout: float, name: str | None = None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.name = name
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if self.name is not None:
+            metrics.increment(f"{self.name}.{'miss' if entry is None else 'hit'}")
+        return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any, timeout: float | None = None):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,11 +1,38 @@
 from unittest.mock import Mock
 
 from config import settings
+from config.storage.async_client import AsyncClient
 from config.storage.google_client import GoogleClient
+from config.storage.local_client import LocalClient
 
 if settings.S3_ENV.lower() == "mock":
     s3_client = Mock(spec=GoogleClient)
     s3_client.generate_presigned_url.return_value = "presigned_url"
-    s3_client.generate_presigned_post_url.return_value = {"url": "some_url", "fields": {}}
+    s3_client.generate_presigned_urls.side_effect = lambda object_names, **_: {
+        object_name: "presigned_url" for object_name in object_names
+    }
+    s3_client.generate_presigned_post_url.return_value = {
+        "url": "some_url",
+        "fields": {},
+    }
+    # Holds no bytes: reads find nothing, so uploads are neither interned nor processed
+    s3_client.open_object.side_effect = FileNotFoundError
+    s3_client.iter_object.side_effect = FileNotFoundError
+    s3_client.list_objects.side_effect = lambda prefix="": iter(())
+elif settings.S3_ENV.lower() == "local":
+    s3_client = LocalClient(
+        root=settings.LOCAL_STORAGE_ROOT,
+        base_url=settings.LOCAL_STORAGE_URL,
+        secret_key=settings.SECRET_KEY,
+        expiry_bucket=settings.PRESIGNED_URL_EXPIRY_BUCKET,
+    )
 else:
-    s3_client = GoogleClient(secret_json_path=settings.GCP_SECRETS_PATH, bucket_name=settings.GCP_BUCKET_NAME)
+    s3_client = GoogleClient(
+        secret_json_path=settings.GCP_SECRETS_PATH,
+        bucket_name=settings.GCP_BUCKET_NAME,
+        expiry_bucket=settings.PRESIGNED_URL_EXPIRY_BUCKET,
+        local_cache_size=settings.PRESIGNED_URL_LOCAL_CACHE_SIZE,
+        max_connections=settings.STORAGE_MAX_CONNECTIONS,
+    )
+
+async_s3_client = AsyncClient(s3_client, max_workers=settings.STORAGE_MAX_CONNECTIONS)
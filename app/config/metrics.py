@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    In-process counters, gauges and timings of the current worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = defaultdict(int)
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, list[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def increment(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def record(self, name: str, duration: float):
+        with self._lock:
+            timing = self._timings[name]
+            timing[0] += 1
+            timing[1] += duration
+            timing[2] = max(timing[2], duration)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def counter(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def hit_ratios(self) -> dict[str, float]:
+        """Hit ratio of every cache tier counting `<name>.hit` and `<name>.miss`"""
+        ratios = {}
+        for name, hits in self._counters.items():
+            if name.endswith(".hit"):
+                tier = name.removesuffix(".hit")
+                total = hits + self._counters.get(f"{tier}.miss", 0)
+                ratios[tier] = hits / total if total else 0.0
+        return ratios
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "hit_ratios": self.hit_ratios(),
+                "timings": {
+                    name: {
+                        "count": count,
+                        "total_ms": total * 1000,
+                        "mean_ms": total * 1000 / count if count else 0.0,
+                        "max_ms": maximum * 1000,
+                    }
+                    for name, (count, total, maximum) in self._timings.items()
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
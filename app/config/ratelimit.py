@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from config.metrics import metrics
+from core.exceptions import TooManyRequestsException
+
+logger = logging.getLogger(__name__)
+
+# Sliding window log: one sorted set member per accepted call, scored by its time.
+# Returns 0 when the call is accepted, else the milliseconds until a slot frees up.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call("ZREMRANGEBYSCORE", key, "-inf", now - window)
+if redis.call("ZCARD", key) >= limit then
+    local oldest = redis.call("ZRANGE", key, 0, 0, "WITHSCORES")
+    return math.max(1, tonumber(oldest[2]) + window - now)
+end
+
+redis.call("ZADD", key, now, ARGV[4])
+redis.call("PEXPIRE", key, window)
+return 0
+"""
+
+
+class RateLimiter:
+    key_prefix = "ratelimit"
+
+    def __init__(self):
+        self._script = None
+
+    @property
+    def script(self):
+        if self._script is None:
+            connection = get_redis_connection("default")
+            self._script = connection.register_script(SLIDING_WINDOW_SCRIPT)
+        return self._script
+
+    def hit(self, operation_id: str, identity: str, limit: int, window: int) -> float:
+        """
+        Records a call and returns 0 if it fits in the window, else the number of
+        seconds to wait before retrying.
+        """
+        now = int(time.time() * 1000)
+        retry_after = self.script(
+            keys=[f"{self.key_prefix}:{operation_id}:{identity}"],
+            args=[now, window * 1000, limit, f"{now}:{uuid.uuid4().hex}"],
+        )
+        return retry_after / 1000
+
+    @staticmethod
+    def get_identity(request: HttpRequest) -> str:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{request.META.get(settings.RATE_LIMIT_CLIENT_IP_HEADER, '')}"
+
+    def check(self, request: HttpRequest, operation_id: str):
+        rule = settings.RATE_LIMITS.get(operation_id)
+        if not settings.RATE_LIMIT_ENABLED or rule is None:
+            return
+
+        try:
+            retry_after = self.hit(operation_id, self.get_identity(request), *rule)
+        except RedisError:
+            # Throttling is best effort, an unavailable Redis must not block the API
+            logger.exception("Rate limiter unavailable")
+            return
+
+        if retry_after:
+            metrics.increment(f"ratelimit.{operation_id}.rejected")
+            raise TooManyRequestsException(detail={"retry_after": retry_after})
+
+
+rate_limiter = RateLimiter()
+
+
+def rate_limit(operation_id: str):
+    """
+    Throttles a view according to settings.RATE_LIMITS[operation_id], per user when
+    authenticated and per client IP otherwise, before the view does any work.
+    """
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(request: HttpRequest, *args, **kwargs):
+                await sync_to_async(rate_limiter.check)(request, operation_id)
+                return await func(request, *args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(request: HttpRequest, *args, **kwargs):
+            rate_limiter.check(request, operation_id)
+            return func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -128,6 +128,10 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Sign-in and sign-up hash passwords on a dedicated pool, rejecting calls beyond its queue
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", 2))
+PASSWORD_HASHING_QUEUE_SIZE = int(os.getenv("PASSWORD_HASHING_QUEUE_SIZE", 32))
+
 # ======================================================================================
 # Redis
 # ======================================================================================
@@ -142,6 +146,69 @@ CACHES = {
     }
 }
 
+# ======================================================================================
+# Celery
+# ======================================================================================
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = (
+    os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true"
+)
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# ======================================================================================
+# Pagination
+# ======================================================================================
+
+# Rows per page of the list endpoints, when the client gives no limit, and at most
+PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 100))
+PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 100))
+
+# ======================================================================================
+# Likes
+# ======================================================================================
+
+# Votes are buffered in Redis and written to Postgres by flush_likes, see core.likes
+LIKE_WRITE_BEHIND = os.getenv("LIKE_WRITE_BEHIND", "false").lower() == "true"
+# Votes written per statement by flush_likes
+LIKE_FLUSH_BATCH_SIZE = int(os.getenv("LIKE_FLUSH_BATCH_SIZE", 1000))
+# Seconds a flush may spend on a batch before another worker can take over
+LIKE_FLUSH_LOCK_TIMEOUT = int(os.getenv("LIKE_FLUSH_LOCK_TIMEOUT", 60))
+# Seconds between the flushes that celery beat schedules with LIKE_WRITE_BEHIND
+LIKE_FLUSH_INTERVAL = int(os.getenv("LIKE_FLUSH_INTERVAL", 5))
+
+CELERY_BEAT_SCHEDULE = (
+    {
+        "flush-likes": {
+            "task": "core.tasks.flush_likes",
+            "schedule": LIKE_FLUSH_INTERVAL,
+            "kwargs": {"batch_size": LIKE_FLUSH_BATCH_SIZE},
+            # A flush delayed past the next one is superseded by it
+            "options": {"expires": LIKE_FLUSH_INTERVAL},
+        }
+    }
+    if LIKE_WRITE_BEHIND
+    else {}
+)
+
+# ======================================================================================
+# Rate limiting
+# ======================================================================================
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_CLIENT_IP_HEADER = os.getenv("RATE_LIMIT_CLIENT_IP_HEADER", "REMOTE_ADDR")
+
+# Maximum calls per sliding window in seconds, by operation_id
+RATE_LIMITS = {
+    "sign_in": (10, 60),
+    "sign_up": (5, 3600),
+    "reset_password": (3, 3600),
+    "generate_upload_presigned_url": (60, 60),
+    "create_collection": (10, 60),
+    "create_collection_items": (60, 60),
+    "create_item_snaps": (30, 60),
+}
+
 # ======================================================================================
 # Email
 # ======================================================================================
@@ -226,6 +293,17 @@ JWT_EXPIRES_IN = os.getenv("JWT_EXPIRES_IN")
 if JWT_EXPIRES_IN is None:
     JWT_EXPIRES_IN = 3600
 
+# Verified access tokens are cached in each worker until they expire
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 4096))
+
+# Access tokens carry the user id and a revocation epoch instead of requiring a lookup
+JWT_STATELESS = os.getenv("JWT_STATELESS", "false").lower() == "true"
+
+# Authenticated users are cached by id token, in Redis and in each worker
+AUTH_CACHE_TIMEOUT = int(os.getenv("AUTH_CACHE_TIMEOUT", 300))
+AUTH_LOCAL_CACHE_TIMEOUT = int(os.getenv("AUTH_LOCAL_CACHE_TIMEOUT", 5))
+AUTH_LOCAL_CACHE_SIZE = int(os.getenv("AUTH_LOCAL_CACHE_SIZE", 1024))
+
 # ======================================================================================
 # S3
 # ======================================================================================
@@ -233,6 +311,39 @@ if JWT_EXPIRES_IN is None:
 S3_ENV = os.getenv("S3_ENV", "mock")
 GCP_BUCKET_NAME = os.getenv("GCP_BUCKET_NAME")
 GCP_SECRETS_PATH = os.getenv("GCP_SECRETS_PATH")
+# Presigned urls are signed at the start of fixed windows of this many seconds, so
+# that every client is handed the same url for an object during a window
+PRESIGNED_URL_EXPIRY_BUCKET = int(os.getenv("PRESIGNED_URL_EXPIRY_BUCKET", 3600))
+PRESIGNED_URL_LOCAL_CACHE_SIZE = int(os.getenv("PRESIGNED_URL_LOCAL_CACHE_SIZE", 4096))
+# Concurrent storage calls of a worker, and size of its HTTP connection pool
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", 16))
+# Longest side in pixels of the WebP copies generated for each uploaded image
+IMAGE_DERIVATIVE_SIZES = {"thumbnail": 128, "medium": 512}
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv("IMAGE_DERIVATIVE_QUALITY", 80))
+# Dominant colors are clustered on a copy of the image downsampled to this size
+DOMINANT_COLORS_COUNT = int(os.getenv("DOMINANT_COLORS_COUNT", 5))
+DOMINANT_COLORS_SAMPLE_SIZE = int(os.getenv("DOMINANT_COLORS_SAMPLE_SIZE", 64))
+DOMINANT_COLORS_KMEANS_ITERATIONS = int(
+    os.getenv("DOMINANT_COLORS_KMEANS_ITERATIONS", 8)
+)
+# Pending items are annotated with the items and pending items of their collection
+# whose perceptual hash is at most this many bits away
+DUPLICATE_MAX_DISTANCE = int(os.getenv("DUPLICATE_MAX_DISTANCE", 6))
+DUPLICATE_MAX_RESULTS = int(os.getenv("DUPLICATE_MAX_RESULTS", 5))
+DUPLICATE_INDEX_CACHE_SIZE = int(os.getenv("DUPLICATE_INDEX_CACHE_SIZE", 256))
+DUPLICATE_INDEX_TIMEOUT = int(os.getenv("DUPLICATE_INDEX_TIMEOUT", 3600))
+COLOR_INDEX_CACHE_SIZE = int(os.getenv("COLOR_INDEX_CACHE_SIZE", 256))
+COLOR_INDEX_TIMEOUT = int(os.getenv("COLOR_INDEX_TIMEOUT", 3600))
+# Content-addressed objects are deleted once unreferenced for this many seconds
+STORED_OBJECT_GRACE_PERIOD = int(os.getenv("STORED_OBJECT_GRACE_PERIOD", 86400))
+# Objects no row references are only deleted once older than this many seconds, so
+# that uploads are left time to be attached
+ORPHANED_OBJECT_GRACE_PERIOD = int(os.getenv("ORPHANED_OBJECT_GRACE_PERIOD", 86400))
+# S3_ENV=local stores objects under this directory, served by the object-storage api
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT") or BASE_DIR / "storage"
+LOCAL_STORAGE_URL = (
+    os.getenv("LOCAL_STORAGE_URL") or "http://localhost:8000/api/object-storage/local"
+)
 
 CREATION_TOKEN_PASSWORD = os.getenv("CREATION_TOKEN_PASSWORD")
 if CREATION_TOKEN_PASSWORD is None:
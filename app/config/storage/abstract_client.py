@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Iterator
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
 
 
 class AbstractClient(ABC):
@@ -7,19 +12,69 @@ class AbstractClient(ABC):
         pass
 
     @abstractmethod
-    def delete_object(self, object_name: str):
+    def open_object(
+        self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> BinaryIO:
+        """File-like object reading the object `chunk_size` bytes at a time"""
+        pass
+
+    def iter_object(
+        self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        with self.open_object(object_name, chunk_size) as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+    @abstractmethod
+    def get_object_range(
+        self, object_name: str, start: int, end: int | None = None
+    ) -> bytes:
+        """Bytes `start` (included) to `end` (excluded) of the object"""
         pass
 
     @abstractmethod
-    def copy_object(
-        self, source_object_name: str, destination_object_name: str
+    def put_object(
+        self, object_name: str, data: bytes | BinaryIO, content_type: str | None = None
     ):
         pass
 
     @abstractmethod
-    def generate_presigned_url(
-        self, object_name: str, expiration: int = 3600
-    ) -> str:
+    def delete_object(self, object_name: str):
+        pass
+
+    def delete_objects(self, object_names: list[str], max_workers: int = 8) -> int:
+        """Deletes the objects concurrently, returns how many of them existed"""
+
+        def delete(object_name: str) -> bool:
+            try:
+                self.delete_object(object_name)
+            except FileNotFoundError:
+                return False
+            return True
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return sum(executor.map(delete, object_names))
+
+    @abstractmethod
+    def list_objects(self, prefix: str = "") -> Iterator[tuple[str, datetime]]:
+        """
+        Names and last update times of the objects, fetched lazily and ordered by
+        the UTF-8 bytes of their names
+        """
+        pass
+
+    @abstractmethod
+    def copy_object(self, source_object_name: str, destination_object_name: str):
+        pass
+
+    @abstractmethod
+    def generate_presigned_url(self, object_name: str, expiration: int = 3600) -> str:
+        pass
+
+    @abstractmethod
+    def generate_presigned_urls(
+        self, object_names: list[str], expiration: int = 3600
+    ) -> dict[str, str]:
         pass
 
     @abstractmethod
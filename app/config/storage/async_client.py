@@ -0,0 +1,113 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, BinaryIO, Callable
+
+from .abstract_client import DEFAULT_CHUNK_SIZE, AbstractClient
+
+
+class AsyncClient:
+    """
+    Awaitable facade of a storage client for async views.
+
+    Blocking calls run on a dedicated executor sized like the client's HTTP
+    connection pool, so the event loop never waits on storage and batch operations
+    run concurrently on pooled connections.
+    """
+
+    # Objects signed per executor call when a batch of urls is split up
+    sign_batch_size = 64
+
+    def __init__(self, client: AbstractClient, max_workers: int):
+        self.client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="storage"
+        )
+
+    async def _run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def get_object(self, object_name: str):
+        return await self._run(self.client.get_object, object_name)
+
+    async def get_object_range(
+        self, object_name: str, start: int, end: int | None = None
+    ) -> bytes:
+        return await self._run(self.client.get_object_range, object_name, start, end)
+
+    async def iter_object(
+        self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        file = await self._run(self.client.open_object, object_name, chunk_size)
+        try:
+            while chunk := await self._run(file.read, chunk_size):
+                yield chunk
+        finally:
+            await self._run(file.close)
+
+    async def put_object(
+        self, object_name: str, data: bytes | BinaryIO, content_type: str | None = None
+    ):
+        return await self._run(self.client.put_object, object_name, data, content_type)
+
+    async def delete_object(self, object_name: str):
+        return await self._run(self.client.delete_object, object_name)
+
+    async def delete_objects(self, object_names: list[str]):
+        await asyncio.gather(*map(self.delete_object, object_names))
+
+    async def copy_object(self, source_object_name: str, destination_object_name: str):
+        return await self._run(
+            self.client.copy_object, source_object_name, destination_object_name
+        )
+
+    async def copy_objects(self, object_names: dict[str, str]):
+        """Copies each source object of `object_names` to its destination"""
+        await asyncio.gather(
+            *(
+                self.copy_object(source, destination)
+                for source, destination in object_names.items()
+            )
+        )
+
+    async def generate_presigned_url(
+        self, object_name: str, expiration: int = 3600
+    ) -> str:
+        return (await self.generate_presigned_urls([object_name], expiration))[
+            object_name
+        ]
+
+    async def generate_presigned_urls(
+        self, object_names: list[str], expiration: int = 3600
+    ) -> dict[str, str]:
+        batches = await asyncio.gather(
+            *(
+                self._run(
+                    self.client.generate_presigned_urls,
+                    object_names[start : start + self.sign_batch_size],
+                    expiration=expiration,
+                )
+                for start in range(0, len(object_names), self.sign_batch_size)
+            )
+        )
+        return {
+            object_name: presigned_url
+            for batch in batches
+            for object_name, presigned_url in batch.items()
+        }
+
+    async def generate_presigned_post_url(
+        self, object_name: str, file_type: str, expiration: int = 3600
+    ) -> dict:
+        return await self._run(
+            self.client.generate_presigned_post_url,
+            object_name,
+            file_type,
+            expiration,
+        )
+
+    async def close_connection(self):
+        await self._run(self.client.close_connection)
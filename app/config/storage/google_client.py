@@ -1,58 +1,296 @@
-from datetime import datetime, timedelta
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, BinaryIO, Callable
 
-from .abstract_client import AbstractClient
-from google.cloud import storage
 from django.core.cache import cache
+from django_redis import get_redis_connection
+from google.api_core.exceptions import GoogleAPIError
+from google.cloud import storage
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+
+from config.cache import LocalCache
+from config.metrics import metrics
+
+from .abstract_client import DEFAULT_CHUNK_SIZE, AbstractClient
+from .signer import V4UrlSigner
 
 
 class GoogleClient(AbstractClient):
     client: storage.Client
     bucket_name: str
+    signer: V4UrlSigner
+    expiry_bucket: int
+    presigned_urls: LocalCache
+
+    # Single-flight signing: how long a worker holds an object's lock, and how long
+    # the other workers wait for the url it publishes
+    sign_lock_timeout_ms = 5000
+    sign_lock_polls = 5
+    sign_lock_poll_interval = 0.02
 
-    def __init__(self, secret_json_path: str, bucket_name: str):
-        self.client = storage.Client.from_service_account_json(secret_json_path)
+    def __init__(
+        self,
+        secret_json_path: str,
+        bucket_name: str,
+        expiry_bucket: int = 3600,
+        local_cache_size: int = 4096,
+        max_connections: int = 10,
+    ):
+        credentials = service_account.Credentials.from_service_account_file(
+            secret_json_path
+        )
+        self.client = storage.Client(
+            project=credentials.project_id, credentials=credentials
+        )
+        # One keep-alive pool shared by every thread calling the client, as large as
+        # the number of calls that may run concurrently
+        self.client._http.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=max_connections),
+        )
         self.bucket_name = bucket_name
+        self.signer = V4UrlSigner(credentials, bucket_name)
+        self.expiry_bucket = expiry_bucket
+        self.presigned_urls = LocalCache(
+            max_size=local_cache_size, timeout=expiry_bucket, name="presigned_url_local"
+        )
+        self._bucket: storage.Bucket | None = None
+        self._bucket_lock = threading.Lock()
+
+    @property
+    def bucket(self) -> storage.Bucket:
+        """Bucket resolved on first use, then shared by every call"""
+        if self._bucket is None:
+            with self._bucket_lock:
+                if self._bucket is None:
+                    with metrics.timer("storage.get_bucket"):
+                        self._bucket = self.client.get_bucket(self.bucket_name)
+        return self._bucket
+
+    def _call(self, operation: str, func: Callable[[storage.Bucket], Any]) -> Any:
+        """Runs an operation on the bucket, resolving it again once if it fails"""
+        with metrics.timer(f"storage.{operation}"):
+            try:
+                return func(self.bucket)
+            except GoogleAPIError:
+                metrics.increment("storage.bucket_refresh")
+                self._bucket = None
+                return func(self.bucket)
 
     def get_object(self, object_name: str):
-        return (
-            self.client.get_bucket(self.bucket_name)
-            .get_blob(object_name)
-            .download_as_string()
+        return self._call(
+            "get_object",
+            lambda bucket: bucket.get_blob(object_name).download_as_bytes(),
         )
 
+    def open_object(self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        return self.bucket.blob(object_name).open("rb", chunk_size=chunk_size)
+
+    def get_object_range(self, object_name: str, start: int, end: int | None = None):
+        return self._call(
+            "get_object_range",
+            lambda bucket: bucket.blob(object_name).download_as_bytes(
+                # The GCS range end is inclusive
+                start=start,
+                end=None if end is None else end - 1,
+            ),
+        )
+
+    def put_object(
+        self, object_name: str, data: bytes | BinaryIO, content_type: str | None = None
+    ):
+        def upload(bucket: storage.Bucket):
+            blob = bucket.blob(object_name)
+            if isinstance(data, bytes):
+                blob.upload_from_string(data, content_type=content_type)
+            else:
+                data.seek(0)
+                blob.upload_from_file(data, content_type=content_type)
+
+        return self._call("put_object", upload)
+
     def delete_object(self, object_name: str):
-        return self.client.get_bucket(self.bucket_name).get_blob(object_name).delete()
+        def delete(bucket: storage.Bucket):
+            blob = bucket.get_blob(object_name)
+            if blob is None:
+                raise FileNotFoundError(object_name)
+            blob.delete()
+
+        return self._call("delete_object", delete)
+
+    def list_objects(self, prefix: str = ""):
+        # Pages of names are requested as the iteration reaches them
+        for blob in self.bucket.list_blobs(
+            prefix=prefix or None, fields="items(name,updated),nextPageToken"
+        ):
+            yield blob.name, blob.updated
 
     def copy_object(self, source_object_name: str, destination_object_name: str):
-        bucket = self.client.get_bucket(self.bucket_name)
-        source_blob = bucket.blob(source_object_name)
-        return bucket.copy_blob(source_blob, bucket, new_name=destination_object_name)
+        return self._call(
+            "copy_object",
+            lambda bucket: bucket.copy_blob(
+                bucket.blob(source_object_name),
+                bucket,
+                new_name=destination_object_name,
+            ),
+        )
+
+    @staticmethod
+    def _presigned_url_cache_key(object_name: str) -> str:
+        return f"s3_presigned_url:{object_name}"
+
+    @staticmethod
+    def _presigned_url_lock_key(object_name: str) -> str:
+        return f"s3_presigned_url_lock:{object_name}"
 
     def generate_presigned_url(self, object_name: str, expiration: int = 3600):
-        cache_key = f"s3_presigned_url:{object_name}"
-        presigned_url = cache.get(cache_key)
-        if presigned_url is not None:
-            return presigned_url
-
-        presigned_url = (
-            self.client
-            .get_bucket(self.bucket_name)
-            .blob(object_name)
-            .generate_signed_url(
-                expiration=(datetime.utcnow() + timedelta(seconds=expiration))
+        return self.generate_presigned_urls([object_name], expiration)[object_name]
+
+    def generate_presigned_urls(self, object_names: list[str], expiration: int = 3600):
+        """
+        Urls are signed at the start of the current expiry bucket and stay valid
+        `expiration` seconds past its end, so every call during a bucket returns the
+        same url for an object and clients and the CDN can reuse the cached bytes.
+
+        They are looked up in the worker's LRU, then in Redis, and only signed when
+        missing from both; both tiers keep them until the bucket ends.
+        """
+        now = time.time()
+        bucket_start = now - now % self.expiry_bucket
+        timeout = bucket_start + self.expiry_bucket - now
+
+        object_names = list(dict.fromkeys(object_names))
+        presigned_urls = {}
+        for object_name in object_names:
+            presigned_url = self.presigned_urls.get(object_name)
+            if presigned_url is not None:
+                presigned_urls[object_name] = presigned_url
+
+        missing = [name for name in object_names if name not in presigned_urls]
+        if missing:
+            found = self._get_cached_presigned_urls(missing)
+            metrics.increment("presigned_url_redis.hit", len(found))
+            metrics.increment("presigned_url_redis.miss", len(missing) - len(found))
+
+            missing = [name for name in missing if name not in found]
+            signed = (
+                self._sign_single_flight(missing, expiration, bucket_start, timeout)
+                if missing
+                else {}
             )
+            for object_name, presigned_url in {**found, **signed}.items():
+                self.presigned_urls.set(object_name, presigned_url, timeout)
+            presigned_urls.update(found)
+            presigned_urls.update(signed)
+
+        self._record_presigned_url_reuse(
+            reused=len(object_names) - len(missing), signed=len(missing)
         )
-        cache.set(cache_key, presigned_url, expiration)
-        return presigned_url
+        return presigned_urls
+
+    def _get_cached_presigned_urls(self, object_names: list[str]) -> dict[str, str]:
+        cache_keys = {
+            self._presigned_url_cache_key(object_name): object_name
+            for object_name in object_names
+        }
+        return {
+            cache_keys[cache_key]: presigned_url
+            for cache_key, presigned_url in cache.get_many(list(cache_keys)).items()
+        }
+
+    def _sign_single_flight(
+        self,
+        object_names: list[str],
+        expiration: int,
+        bucket_start: float,
+        timeout: float,
+    ) -> dict[str, str]:
+        """
+        Signs the urls whose lock this worker wins, and waits for the other workers
+        to publish the rest, signing them anyway if they do not show up in time.
+        """
+        connection = get_redis_connection("default")
+        with connection.pipeline(transaction=False) as pipeline:
+            for object_name in object_names:
+                pipeline.set(
+                    self._presigned_url_lock_key(object_name),
+                    1,
+                    nx=True,
+                    px=self.sign_lock_timeout_ms,
+                )
+            acquired = pipeline.execute()
+
+        owned = [name for name, won in zip(object_names, acquired) if won]
+        waiting = [name for name, won in zip(object_names, acquired) if not won]
+
+        presigned_urls = {}
+        if owned:
+            try:
+                presigned_urls.update(
+                    self._sign(owned, expiration, bucket_start, timeout)
+                )
+            finally:
+                connection.delete(*map(self._presigned_url_lock_key, owned))
+
+        for _ in range(self.sign_lock_polls):
+            if not waiting:
+                break
+            time.sleep(self.sign_lock_poll_interval)
+            found = self._get_cached_presigned_urls(waiting)
+            presigned_urls.update(found)
+            waiting = [name for name in waiting if name not in found]
+
+        if waiting:
+            metrics.increment("storage.sign_lock_timeout", len(waiting))
+            presigned_urls.update(
+                self._sign(waiting, expiration, bucket_start, timeout)
+            )
+        return presigned_urls
+
+    def _sign(
+        self,
+        object_names: list[str],
+        expiration: int,
+        bucket_start: float,
+        timeout: float,
+    ) -> dict[str, str]:
+        with metrics.timer("storage.sign_urls"):
+            signed_urls = self.signer.sign_many(
+                object_names,
+                self.expiry_bucket + expiration,
+                signed_at=datetime.fromtimestamp(bucket_start, tz=timezone.utc),
+            )
+        # Cached until the bucket ends, when the next bucket's url takes over
+        cache.set_many(
+            {
+                self._presigned_url_cache_key(object_name): presigned_url
+                for object_name, presigned_url in signed_urls.items()
+            },
+            math.ceil(timeout),
+        )
+        return signed_urls
+
+    @staticmethod
+    def _record_presigned_url_reuse(reused: int, signed: int):
+        metrics.increment("storage.presigned_url.reused", reused)
+        metrics.increment("storage.presigned_url.signed", signed)
+        reused = metrics.counter("storage.presigned_url.reused")
+        total = reused + metrics.counter("storage.presigned_url.signed")
+        if total:
+            metrics.gauge("storage.presigned_url.reuse_ratio", reused / total)
 
     def generate_presigned_post_url(
         self, object_name: str, file_type: str, expiration: int = 3600
     ):
-        return self.client.generate_signed_post_policy_v4(
-            bucket_name=self.bucket_name,
-            blob_name=object_name,
-            expiration=(datetime.utcnow() + timedelta(seconds=expiration)),
-        )
+        with metrics.timer("storage.generate_presigned_post_url"):
+            return self.client.generate_signed_post_policy_v4(
+                bucket_name=self.bucket_name,
+                blob_name=object_name,
+                expiration=(datetime.utcnow() + timedelta(seconds=expiration)),
+            )
 
     def close_connection(self):
         self.client.close()
@@ -0,0 +1,150 @@
+import hmac
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import quote, urlencode
+
+from django.utils.crypto import salted_hmac
+
+from .abstract_client import DEFAULT_CHUNK_SIZE, AbstractClient
+
+
+class LocalClient(AbstractClient):
+    """
+    Object storage on a local directory tree, serving HMAC-signed urls through the
+    object-storage api, so that load tests and CI handle real bytes offline.
+    """
+
+    key_salt = "config.storage.local_client.LocalClient"
+
+    def __init__(
+        self, root: str, base_url: str, secret_key: str, expiry_bucket: int = 3600
+    ):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+        self.secret_key = secret_key
+        self.expiry_bucket = expiry_bucket
+
+    def path(self, object_name: str) -> Path:
+        path = (self.root / object_name).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise FileNotFoundError(object_name)
+        return path
+
+    def get_object(self, object_name: str):
+        with open(self.path(object_name), "rb") as file:
+            return file.read()
+
+    def open_object(self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        return open(self.path(object_name), "rb", buffering=chunk_size)
+
+    def get_object_range(self, object_name: str, start: int, end: int | None = None):
+        with open(self.path(object_name), "rb") as file:
+            file.seek(start)
+            return file.read(-1 if end is None else max(0, end - start))
+
+    def put_object(
+        self, object_name: str, data: bytes | BinaryIO, content_type: str | None = None
+    ):
+        path = self.path(object_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside then renamed, so that readers and hardlinked copies never
+        # see a partial object
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+            if isinstance(data, bytes):
+                file.write(data)
+            else:
+                shutil.copyfileobj(data, file, DEFAULT_CHUNK_SIZE)
+        os.replace(file.name, path)
+
+    def delete_object(self, object_name: str):
+        self.path(object_name).unlink()
+
+    def list_objects(self, prefix: str = ""):
+        def walk(directory: str):
+            # A directory sorts like the names it holds: its own name followed by "/"
+            entries = sorted(
+                os.scandir(directory),
+                key=lambda entry: entry.name + "/" if entry.is_dir() else entry.name,
+            )
+            for entry in entries:
+                if entry.is_dir():
+                    yield from walk(entry.path)
+                    continue
+                object_name = Path(entry.path).relative_to(self.root).as_posix()
+                if object_name.startswith(prefix):
+                    # Unlike mtime, ctime also moves when a copy links the file
+                    updated = datetime.fromtimestamp(
+                        entry.stat().st_ctime, timezone.utc
+                    )
+                    yield object_name, updated
+
+        yield from walk(self.root)
+
+    def copy_object(self, source_object_name: str, destination_object_name: str):
+        source = self.path(source_object_name)
+        destination = self.path(destination_object_name)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.unlink(missing_ok=True)
+        try:
+            # Objects are never modified in place, so both names can share the inode
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+
+    def sign(self, method: str, object_name: str, expires: int) -> str:
+        return salted_hmac(
+            self.key_salt,
+            f"{method}\n{object_name}\n{expires}",
+            secret=self.secret_key,
+            algorithm="sha256",
+        ).hexdigest()
+
+    def verify(self, method: str, object_name: str, expires: int, signature: str):
+        return expires >= time.time() and hmac.compare_digest(
+            self.sign(method, object_name, expires), signature
+        )
+
+    def _expires(self, expiration: int) -> int:
+        """Same expiry for every url of the current bucket, see GoogleClient"""
+        now = int(time.time())
+        return now - now % self.expiry_bucket + self.expiry_bucket + expiration
+
+    def generate_presigned_url(self, object_name: str, expiration: int = 3600):
+        return self.generate_presigned_urls([object_name], expiration)[object_name]
+
+    def generate_presigned_urls(self, object_names: list[str], expiration: int = 3600):
+        expires = self._expires(expiration)
+        return {
+            object_name: (
+                f"{self.base_url}/{quote(object_name, safe='/~')}?"
+                + urlencode(
+                    {
+                        "expires": expires,
+                        "signature": self.sign("GET", object_name, expires),
+                    }
+                )
+            )
+            for object_name in object_names
+        }
+
+    def generate_presigned_post_url(
+        self, object_name: str, file_type: str, expiration: int = 3600
+    ):
+        expires = int(time.time()) + expiration
+        return {
+            "url": self.base_url,
+            "fields": {
+                "key": object_name,
+                "expires": str(expires),
+                "signature": self.sign("POST", object_name, expires),
+            },
+        }
+
+    def close_connection(self):
+        pass
@@ -4,12 +4,15 @@ from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
 from core.models.collections import Collection, Item, Like, Snap
+from core.models.common import InternedUpload, StoredObject
 from userauth.models import Token, User
 
 admin.site.register(Collection)
 admin.site.register(Item)
 admin.site.register(Snap)
 admin.site.register(Like)
+admin.site.register(StoredObject)
+admin.site.register(InternedUpload)
 
 admin.site.enable_nav_sidebar = False
 
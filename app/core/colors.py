@@ -0,0 +1,89 @@
+import heapq
+import math
+from collections import defaultdict
+from uuid import UUID
+
+from django.conf import settings
+
+from config.cache import LocalCache
+from core.indexes import CollectionIndex
+
+Lab = tuple[float, float, float]
+
+# Largest distance between two colors of the Lab gamut of sRGB
+LAB_DIAMETER = 260.0
+
+
+class ColorIndex(CollectionIndex):
+    """
+    Dominant Lab colors of the items of a collection, bucketed in a uniform grid
+    of cubes of `cell_size`.
+
+    A nearest-neighbour query scans the cubes ring by ring around the query's cube
+    and stops as soon as the next ring is farther than the k-th best match, so it
+    only visits the neighbourhood of the query color.
+    """
+
+    labels = ["core.Item"]
+    field = "dominant_lab"
+    registry = LocalCache(
+        max_size=settings.COLOR_INDEX_CACHE_SIZE,
+        timeout=settings.COLOR_INDEX_TIMEOUT,
+        name="color_index",
+    )
+    cell_size = 8.0
+
+    def reset(self):
+        self.cells: dict[tuple[int, int, int], list[tuple[Lab, tuple]]] = defaultdict(
+            list
+        )
+
+    def convert(self, value: list[float]) -> Lab:
+        return tuple(value)
+
+    def cell(self, color: Lab) -> tuple[int, int, int]:
+        return tuple(math.floor(channel / self.cell_size) for channel in color)
+
+    def insert(self, key: tuple[str, UUID], value: Lab):
+        self.cells[self.cell(value)].append((value, key))
+
+    def _ring(self, center: tuple[int, int, int], radius: int):
+        """Cells at Chebyshev distance `radius` of the center that hold colors"""
+        if (2 * radius + 1) ** 3 > len(self.cells):
+            for cell, entries in self.cells.items():
+                if max(abs(a - b) for a, b in zip(cell, center)) == radius:
+                    yield entries
+            return
+
+        x, y, z = center
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                on_face = abs(dx) == radius or abs(dy) == radius
+                for dz in (
+                    range(-radius, radius + 1) if on_face else {-radius, radius}
+                ):
+                    entries = self.cells.get((x + dx, y + dy, z + dz))
+                    if entries:
+                        yield entries
+
+    def search(self, color: Lab, limit: int) -> list[tuple[float, UUID]]:
+        """(distance, pk) of the `limit` items whose dominant color is the closest"""
+        self.sync()
+        with self._lock:
+            center = self.cell(color)
+            # Max-heap of the best matches: (-distance, pk)
+            best: list[tuple[float, UUID]] = []
+            for radius in range(math.ceil(LAB_DIAMETER / self.cell_size) + 2):
+                # Any color in this ring is at least this far from the query
+                if len(best) == limit and (radius - 1) * self.cell_size > -best[0][0]:
+                    break
+                for entries in self._ring(center, radius):
+                    for value, key in entries:
+                        if not self.is_live(key, value):
+                            continue
+                        distance = math.dist(color, value)
+                        if len(best) < limit:
+                            heapq.heappush(best, (-distance, key[1]))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, key[1]))
+            return sorted((-distance, pk) for distance, pk in best)
@@ -0,0 +1,38 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models.collections import Collection, Item, Like, Snap
+
+
+def counted(model, foreign_key: str, **filters) -> Coalesce:
+    """Number of rows of `model` pointing to the outer row through `foreign_key`"""
+    rows = (
+        model.objects.filter(**{foreign_key: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(foreign_key)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def reconcile_counters(dry_run: bool = False) -> dict[str, int]:
+    """
+    Sets the counter columns that drifted from the rows they count, e.g. after
+    bulk writes that skip Model.save, and returns how many rows were off for each
+    counter.
+    """
+    counters = [
+        (Collection, "nb_items", counted(Item, "collection")),
+        (Item, "nb_snaps", counted(Snap, "item")),
+        (Snap, "nb_likes", counted(Like, "snap", liked=True)),
+        (Snap, "nb_dislikes", counted(Like, "snap", liked=False)),
+    ]
+
+    drifts = {}
+    for model, name, actual in counters:
+        drifted = model.objects.annotate(actual=actual).exclude(**{name: F("actual")})
+        drifts[f"{model.__name__}.{name}"] = (
+            drifted.count() if dry_run else drifted.update(**{name: F("actual")})
+        )
+    return drifts
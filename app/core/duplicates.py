@@ -0,0 +1,149 @@
+from collections import defaultdict
+from typing import Hashable
+from uuid import UUID
+
+from django.apps import apps
+from django.conf import settings
+
+from config.cache import LocalCache
+from core.indexes import CollectionIndex
+
+HASH_BITS = 64
+
+
+def to_signed(value: int) -> int:
+    """Stores an unsigned 64-bit hash in a signed BigIntegerField"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & ((1 << HASH_BITS) - 1)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree of perceptual hashes under the Hamming distance.
+
+    Each child edge is labelled with the distance between the child and its
+    parent, so a search within `d` of a query only descends into the edges within
+    `d` of the query's distance to the node (triangle inequality), which skips most
+    of the tree for small distances.
+    """
+
+    def __init__(self):
+        # Node: (hash, keys sharing that hash, children by distance)
+        self.root: tuple[int, list, dict] | None = None
+        self.size = 0
+
+    def add(self, value: int, key: Hashable):
+        self.size += 1
+        if self.root is None:
+            self.root = (value, [key], {})
+            return
+
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [key], {})
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, int, Hashable]]:
+        """(distance, hash, key) of the entries within `max_distance` of `value`"""
+        results = []
+        candidates = [self.root] if self.root is not None else []
+        while candidates:
+            node = candidates.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, node[0], key) for key in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            candidates.extend(
+                child for edge, child in node[2].items() if low <= edge <= high
+            )
+        return sorted(results, key=lambda result: result[0])
+
+
+class DuplicateIndex(CollectionIndex):
+    """Perceptual hashes of the items and pending items of a collection"""
+
+    labels = ["core.Item", "core.PendingItem"]
+    field = "perceptual_hash"
+    registry = LocalCache(
+        max_size=settings.DUPLICATE_INDEX_CACHE_SIZE,
+        timeout=settings.DUPLICATE_INDEX_TIMEOUT,
+        name="duplicate_index",
+    )
+
+    def reset(self):
+        self.tree = BKTree()
+
+    def insert(self, key: tuple[str, UUID], value: int):
+        self.tree.add(value, key)
+
+    def convert(self, value: int) -> int:
+        return to_unsigned(value)
+
+    def search(
+        self, value: int, max_distance: int, exclude: tuple[str, UUID] | None = None
+    ) -> list[tuple[int, str, UUID]]:
+        """(distance, model label, pk) of the rows whose image is within reach"""
+        self.sync()
+        with self._lock:
+            return [
+                (distance, *key)
+                for distance, found, key in self.tree.search(value, max_distance)
+                if key != exclude and self.is_live(key, found)
+            ]
+
+
+def find_duplicates(instance) -> list[dict]:
+    """
+    Items and pending items of the instance's collection whose image looks like
+    the instance's, closest first.
+    """
+    if instance.perceptual_hash is None:
+        return []
+
+    index = DuplicateIndex.for_collection(instance.collection_id)
+    while True:
+        matches = index.search(
+            to_unsigned(instance.perceptual_hash),
+            settings.DUPLICATE_MAX_DISTANCE,
+            exclude=(instance._meta.label, instance.pk),
+        )[: settings.DUPLICATE_MAX_RESULTS]
+
+        pks_by_label = defaultdict(list)
+        for _, label, pk in matches:
+            pks_by_label[label].append(pk)
+        names = {
+            (label, pk): name
+            for label, pks in pks_by_label.items()
+            for pk, name in apps.get_model(label)
+            .objects.filter(pk__in=pks)
+            .values_list("pk", "name")
+        }
+        vanished = [(label, pk) for _, label, pk in matches if (label, pk) not in names]
+        if not vanished:
+            break
+        # Deleted since indexed, searched again so that others take their place
+        index.discard(vanished)
+
+    return [
+        {
+            "id": pk,
+            "name": names[(label, pk)],
+            "kind": apps.get_model(label)._meta.model_name,
+            "distance": distance,
+        }
+        for distance, label, pk in matches
+    ]
@@ -49,3 +49,23 @@ class UnauthorizedException(PoukidexException):
         super().__init__(
             message="Unauthorized", status=HTTPStatus.UNAUTHORIZED, *args, **kwargs
         )
+
+
+class ServiceUnavailableException(PoukidexException):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(
+            message="Service temporarily unavailable, please retry later.",
+            status=HTTPStatus.SERVICE_UNAVAILABLE,
+            *args,
+            **kwargs,
+        )
+
+
+class TooManyRequestsException(PoukidexException):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(
+            message="Too many requests, please retry later.",
+            status=HTTPStatus.TOO_MANY_REQUESTS,
+            *args,
+            **kwargs,
+        )
@@ -0,0 +1,122 @@
+import io
+from typing import BinaryIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+def open_image(file: BinaryIO, max_size: int) -> Image.Image:
+    """
+    Decodes an image upright and in RGB(A), letting JPEG decoding downscale by a
+    power of two while staying larger than `max_size`.
+    """
+    with Image.open(file) as image:
+        image.draft("RGB", (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+        return image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+
+def render_derivatives(image: Image.Image, sizes: dict[str, int]) -> dict[str, bytes]:
+    """
+    Renders the image as a WebP fitting in a square of each size, from the largest
+    to the smallest so that each one is downscaled from the previous one.
+    """
+    image = image.copy()
+    derivatives = {}
+    for size_name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=settings.IMAGE_DERIVATIVE_QUALITY, method=4)
+        derivatives[size_name] = buffer.getvalue()
+    return derivatives
+
+
+def extract_dominant_colors(image: Image.Image, count: int, sample_size: int) -> dict:
+    """
+    Clusters the colors of a downsampled copy of the image with k-means, seeded by
+    a median cut, and returns the clusters ordered by the share of pixels they hold.
+    """
+    sample = image.convert("RGB")
+    sample.thumbnail((sample_size, sample_size), Image.Resampling.BOX)
+    quantized = sample.quantize(
+        colors=count,
+        method=Image.Quantize.MEDIANCUT,
+        kmeans=settings.DOMINANT_COLORS_KMEANS_ITERATIONS,
+        dither=Image.Dither.NONE,
+    )
+
+    palette = quantized.getpalette()
+    pixels = sample.width * sample.height
+    colors = [
+        {
+            "color": "#{:02x}{:02x}{:02x}".format(*palette[index * 3 : index * 3 + 3]),
+            "share": round(pixel_count / pixels, 4),
+        }
+        for pixel_count, index in sorted(quantized.getcolors(count), reverse=True)
+    ]
+    return {
+        "platform": "server",
+        "dominant": colors[0]["color"],
+        "colors": colors,
+    }
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Perceptual hash of the image: one bit per pair of horizontally adjacent pixels
+    of a grayscale thumbnail, set when brightness increases from left to right.
+    Near-identical photos differ by a few bits.
+    """
+    pixels = list(
+        image.convert("L")
+        .resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+        .getdata()
+    )
+    value = 0
+    for row in range(hash_size):
+        for column in range(hash_size):
+            offset = row * (hash_size + 1) + column
+            value = value << 1 | (pixels[offset] < pixels[offset + 1])
+    return value
+
+
+def hex_to_lab(color: str) -> tuple[float, float, float]:
+    """CIE L*a*b* coordinates (D65) of an sRGB `#rrggbb` color"""
+    color = color.lstrip("#")
+    if len(color) != 6:
+        raise ValueError(f"Invalid color {color}")
+
+    def linear(channel: int) -> float:
+        channel /= 255
+        if channel <= 0.04045:
+            return channel / 12.92
+        return ((channel + 0.055) / 1.055) ** 2.4
+
+    red, green, blue = (linear(int(color[i : i + 2], 16)) for i in (0, 2, 4))
+    x = (0.4124564 * red + 0.3575761 * green + 0.1804375 * blue) / 0.95047
+    y = 0.2126729 * red + 0.7151522 * green + 0.0721750 * blue
+    z = (0.0193339 * red + 0.1191920 * green + 0.9503041 * blue) / 1.08883
+
+    def f(t: float) -> float:
+        return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return (
+        round(116 * fy - 16, 2),
+        round(500 * (fx - fy), 2),
+        round(200 * (fy - fz), 2),
+    )
+
+
+def dominant_color_lab(dominant_colors: dict | None) -> list[float] | None:
+    """
+    Lab coordinates of the dominant color, read from the `dominant` color computed
+    by the workers, or the `primary` one sent by iOS clients.
+    """
+    if not isinstance(dominant_colors, dict):
+        return None
+    color = dominant_colors.get("dominant") or dominant_colors.get("primary")
+    try:
+        return list(hex_to_lab(color))
+    except (AttributeError, TypeError, ValueError):
+        return None
@@ -0,0 +1,99 @@
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Hashable
+from uuid import UUID
+
+from django.apps import apps
+
+from config.cache import LocalCache
+
+
+class CollectionIndex(ABC):
+    """
+    In-memory index over one column of the rows of a collection, kept in each
+    worker.
+
+    Rows written since the last lookup are inserted incrementally, found through
+    their `updated_at`. Entries whose value changed stay in the structure but are
+    skipped by lookups, and the structure is rebuilt once they outnumber the live
+    ones. Deleted rows leave nothing to sync, so lookups discard those they find.
+    """
+
+    labels: list[str]
+    field: str
+    registry: LocalCache
+    sync_margin = timedelta(seconds=60)
+
+    _registry_lock = threading.Lock()
+
+    def __init__(self, collection_id: UUID):
+        self.collection_id = collection_id
+        self.values: dict[tuple[str, UUID], Any] = {}
+        self.size = 0
+        self.synced_at: datetime | None = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def for_collection(cls, collection_id: UUID):
+        with cls._registry_lock:
+            index = cls.registry.get(collection_id)
+            if index is None:
+                index = cls(collection_id)
+                cls.registry.set(collection_id, index)
+            return index
+
+    @abstractmethod
+    def reset(self):
+        """Empties the structure"""
+
+    @abstractmethod
+    def insert(self, key: Hashable, value: Any):
+        """Adds a row to the structure"""
+
+    def convert(self, value: Any) -> Any:
+        """Indexed value of a column value"""
+        return value
+
+    def is_live(self, key: Hashable, value: Any) -> bool:
+        return self.values.get(key) == value
+
+    def discard(self, keys: list[Hashable]):
+        """Skips rows found deleted from now on"""
+        with self._lock:
+            for key in keys:
+                self.values.pop(key, None)
+
+    def sync(self):
+        with self._lock:
+            if self.size > 2 * max(len(self.values), 1):
+                self.reset()
+                self.values, self.size, self.synced_at = {}, 0, None
+
+            synced_at = self.synced_at
+            for label in self.labels:
+                queryset = apps.get_model(label).objects.filter(
+                    collection_id=self.collection_id
+                )
+                if self.synced_at is not None:
+                    # Rows committed late may carry a slightly older updated_at
+                    queryset = queryset.filter(
+                        updated_at__gte=self.synced_at - self.sync_margin
+                    )
+                rows = queryset.values_list("pk", self.field, "updated_at")
+                if self.synced_at is None:
+                    rows = rows.exclude(**{f"{self.field}__isnull": True})
+
+                for pk, value, updated_at in rows:
+                    key = (label, pk)
+                    value = None if value is None else self.convert(value)
+                    if value is None:
+                        self.values.pop(key, None)
+                    elif self.values.get(key) != value:
+                        self.insert(key, value)
+                        self.values[key] = value
+                        self.size += 1
+                    if synced_at is None or updated_at > synced_at:
+                        synced_at = updated_at
+            self.synced_at = synced_at
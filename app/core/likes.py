@@ -0,0 +1,227 @@
+import logging
+from itertools import islice
+from uuid import UUID
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import LockError, ResponseError
+
+from config.metrics import metrics
+from core.models.collections import Like, Snap
+from userauth.models import User
+
+logger = logging.getLogger(__name__)
+
+LIKED, DISLIKED, DELETED = "1", "0", "-"
+
+# Applies a batch of votes, a null `liked` deleting the like, and moves the counters
+# of their snaps. Upserts only bump updated_at when the vote changes, which tells
+# them apart from votes already applied, so that a batch can be replayed.
+FLUSH_SQL = """
+WITH votes AS (
+    SELECT *
+    FROM unnest(%(snap_ids)s::uuid[], %(user_ids)s::uuid[], %(liked)s::boolean[])
+        AS v(snap_id, user_id, liked)
+), deleted AS (
+    DELETE FROM {like} l
+    USING votes v
+    WHERE l.snap_id = v.snap_id AND l.user_id = v.user_id AND v.liked IS NULL
+    RETURNING l.snap_id, -l.liked::int AS likes, -(NOT l.liked)::int AS dislikes
+), upserted AS (
+    INSERT INTO {like} AS l (snap_id, user_id, liked, created_at, updated_at)
+    SELECT v.snap_id, v.user_id, v.liked, %(now)s, %(now)s
+    FROM votes v
+    JOIN {snap} s ON s.id = v.snap_id
+    JOIN {user} u ON u.id = v.user_id
+    WHERE v.liked IS NOT NULL
+    ORDER BY v.snap_id, v.user_id
+    ON CONFLICT ON CONSTRAINT unique_like_user_snap DO UPDATE SET
+        liked = EXCLUDED.liked,
+        updated_at = CASE
+            WHEN l.liked = EXCLUDED.liked THEN l.updated_at
+            ELSE EXCLUDED.updated_at
+        END
+    RETURNING
+        l.snap_id, l.liked, l.xmax = 0 AS created, l.updated_at = %(now)s AS changed
+), moved AS (
+    SELECT snap_id, likes, dislikes FROM deleted
+    UNION ALL
+    SELECT
+        snap_id,
+        CASE WHEN liked THEN 1 WHEN created THEN 0 ELSE -1 END,
+        CASE WHEN NOT liked THEN 1 WHEN created THEN 0 ELSE -1 END
+    FROM upserted
+    WHERE changed
+)
+UPDATE {snap} s SET
+    nb_likes = s.nb_likes + m.likes,
+    nb_dislikes = s.nb_dislikes + m.dislikes
+FROM (
+    SELECT snap_id, sum(likes) AS likes, sum(dislikes) AS dislikes
+    FROM moved
+    GROUP BY snap_id
+) m
+WHERE s.id = m.snap_id
+"""
+
+
+def encode_vote(liked: bool | None) -> str:
+    return DELETED if liked is None else LIKED if liked else DISLIKED
+
+
+def decode_vote(value: bytes) -> bool | None:
+    return None if value.decode() == DELETED else value.decode() == LIKED
+
+
+class LikeBuffer:
+    """
+    Write-behind buffer of the likes, for settings.LIKE_WRITE_BEHIND.
+
+    Votes are recorded in the `pending` Redis hash, by snap and user, rather than
+    written to Postgres. Reads of a user's own like look at the buffer before the
+    table, so that users see their votes right away, while the lists of likes and
+    the counters of the snaps catch up on the next flush.
+
+    A flush renames `pending` to `flushing`, which new votes do not touch, applies
+    it to Postgres in batches and deletes it. A flush that crashed leaves
+    `flushing` behind, and the next one replays it before taking new votes.
+    """
+
+    key_prefix = "likes"
+
+    @property
+    def pending_key(self) -> str:
+        return f"{self.key_prefix}:pending"
+
+    @property
+    def flushing_key(self) -> str:
+        return f"{self.key_prefix}:flushing"
+
+    @property
+    def lock_key(self) -> str:
+        return f"{self.key_prefix}:flush-lock"
+
+    @staticmethod
+    def field(snap_id: UUID, user: User) -> str:
+        return f"{snap_id}:{user.pk}"
+
+    def buffered(self, snap_id: UUID, user: User) -> tuple[bool, bool | None]:
+        """
+        Whether the buffer holds a vote of the user on the snap, and that vote,
+        None standing for a deleted like
+        """
+        field = self.field(snap_id, user)
+        # Pending votes are newer than the ones being flushed. Both are read at once,
+        # so that a flush starting in between does not hide the vote it moved.
+        with get_redis_connection("default").pipeline(transaction=True) as pipeline:
+            pipeline.hget(self.pending_key, field)
+            pipeline.hget(self.flushing_key, field)
+            values = [value for value in pipeline.execute() if value is not None]
+        if not values:
+            return False, None
+        return True, decode_vote(values[0])
+
+    def get(self, snap_id: UUID, user: User) -> Like:
+        """The like of the user on the snap, as of their last vote"""
+        found, liked = self.buffered(snap_id, user)
+        if not found:
+            return Like.objects.get(snap_id=snap_id, user=user)
+        if liked is None:
+            raise Like.DoesNotExist("Like matching query does not exist.")
+
+        like = Like.objects.filter(snap_id=snap_id, user=user).first()
+        if like is None:
+            # Not flushed yet, so has no id
+            like = Like(snap_id=snap_id, user=user)
+        like.liked = liked
+        return like
+
+    def vote(self, snap_id: UUID, user: User, liked: bool) -> Like:
+        like = Like.objects.filter(snap_id=snap_id, user=user).first()
+        if like is None:
+            if not Snap.objects.filter(pk=snap_id).exists():
+                raise Snap.DoesNotExist("Snap matching query does not exist.")
+            like = Like(snap_id=snap_id, user=user)
+        self.record(snap_id, user, liked)
+        like.liked = liked
+        return like
+
+    def delete(self, snap_id: UUID, user: User):
+        self.get(snap_id, user)
+        self.record(snap_id, user, None)
+
+    def record(self, snap_id: UUID, user: User, liked: bool | None):
+        get_redis_connection("default").hset(
+            self.pending_key, self.field(snap_id, user), encode_vote(liked)
+        )
+        metrics.increment("likes.buffered")
+
+    def flush(self, batch_size: int) -> int:
+        """
+        Writes the buffered votes to Postgres, one statement per batch, and returns
+        how many were written. Returns 0 without waiting when another flush runs.
+        """
+        redis = get_redis_connection("default")
+        lock = redis.lock(self.lock_key, timeout=settings.LIKE_FLUSH_LOCK_TIMEOUT)
+        if not lock.acquire(blocking=False):
+            return 0
+
+        flushed = 0
+        try:
+            if not redis.exists(self.flushing_key):
+                try:
+                    redis.rename(self.pending_key, self.flushing_key)
+                except ResponseError:
+                    # No pending votes
+                    return 0
+
+            votes = redis.hscan_iter(self.flushing_key, count=batch_size)
+            while batch := list(islice(votes, batch_size)):
+                # Raises when another worker took over after the lock expired
+                lock.reacquire()
+                self.apply(batch)
+                flushed += len(batch)
+
+            # Until now, reads found the flushed votes in the buffer
+            lock.reacquire()
+            redis.delete(self.flushing_key)
+        except LockError:
+            logger.warning("Likes flush lost its lock, leaving the rest to replay")
+            return flushed
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                pass
+
+        metrics.increment("likes.flushed", flushed)
+        return flushed
+
+    @staticmethod
+    def apply(votes: list[tuple[bytes, bytes]]):
+        snap_ids, user_ids, liked = [], [], []
+        # Scans may return a field twice, which a single upsert cannot write twice
+        for field, value in dict(votes).items():
+            snap_id, user_id = field.decode().split(":")
+            snap_ids.append(snap_id)
+            user_ids.append(user_id)
+            liked.append(decode_vote(value))
+
+        sql = FLUSH_SQL.format(
+            like=Like._meta.db_table,
+            snap=Snap._meta.db_table,
+            user=User._meta.db_table,
+        )
+        params = {
+            "snap_ids": snap_ids,
+            "user_ids": user_ids,
+            "liked": liked,
+            "now": timezone.now(),
+        }
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+like_buffer = LikeBuffer()
@@ -0,0 +1,49 @@
+"""
+A Django Management Command computing the dominant colors of existing images.
+
+Queues one Celery task per batch of collections, items, pending items and snaps
+whose image has no dominant colors yet, or runs them in-process with --sync.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.models.collections import Collection, Item, PendingItem, Snap
+from core.tasks import compute_dominant_colors
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the dominant colors of stored images. "
+        "Usage backfill_dominant_colors [--batch-size N] [--all] [--sync]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--all", action="store_true", help="Recompute already filled colors"
+        )
+        parser.add_argument(
+            "--sync", action="store_true", help="Run in-process instead of queuing"
+        )
+
+    def handle(self, batch_size, all, sync, *args, **options):
+        for model in [Collection, Item, PendingItem, Snap]:
+            queryset = model.objects.exclude(object_name__isnull=True).exclude(
+                object_name=""
+            )
+            if not all:
+                queryset = queryset.filter(dominant_colors__isnull=True)
+            pks = [
+                str(pk) for pk in queryset.order_by("pk").values_list("pk", flat=True)
+            ]
+
+            for start in range(0, len(pks), batch_size):
+                batch = pks[start : start + batch_size]
+                if sync:
+                    compute_dominant_colors(model._meta.label, batch)
+                else:
+                    compute_dominant_colors.delay(model._meta.label, batch)
+            self.stdout.write(
+                f"{model.__name__}: {len(pks)} images "
+                f"{'processed' if sync else 'queued'}"
+            )
@@ -0,0 +1,51 @@
+"""
+A Django Management Command measuring nearest-color queries on a collection index.
+
+Fills an in-memory color index with random dominant colors, without touching the
+database, then times k-nearest-neighbour queries against it.
+"""
+
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from core.colors import ColorIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the color index of a collection. "
+        "Usage benchmark_color_index [--items N] [--queries N] [--limit N]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=1000)
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, items, queries, limit, seed, *args, **options):
+        rng = random.Random(seed)
+
+        def random_lab():
+            return (rng.uniform(0, 100), rng.uniform(-80, 80), rng.uniform(-80, 80))
+
+        index = ColorIndex(uuid.uuid4())
+        index.sync = lambda: None
+        start = time.perf_counter()
+        for _ in range(items):
+            key, color = ("core.Item", uuid.uuid4()), random_lab()
+            index.insert(key, color)
+            index.values[key] = color
+        built = time.perf_counter() - start
+
+        colors = [random_lab() for _ in range(queries)]
+        start = time.perf_counter()
+        for color in colors:
+            index.search(color, limit)
+        searched = time.perf_counter() - start
+
+        print(f"{items} items indexed in {built * 1e3:.0f} ms")
+        print(f"{limit} nearest colors: {searched * 1e3 / queries:.3f} ms/query")
@@ -0,0 +1,63 @@
+"""
+A Django Management Command measuring dominant color extraction throughput.
+
+Decodes, downsamples and clusters synthetic JPEG photos on the current core, the
+work a worker does per image once it has been downloaded.
+"""
+
+import io
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter
+
+from core.images import extract_dominant_colors, open_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks dominant color extraction in images per second on one core. "
+        "Usage benchmark_dominant_colors [--images N] [--size N]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=50)
+        parser.add_argument("--size", type=int, default=2048)
+        parser.add_argument("--seed", type=int, default=0)
+
+    @staticmethod
+    def make_photo(rng: random.Random, size: int) -> bytes:
+        image = Image.new(
+            "RGB", (size, size * 3 // 4), tuple(rng.choices(range(256), k=3))
+        )
+        draw = ImageDraw.Draw(image)
+        for _ in range(30):
+            x, y = rng.randrange(size), rng.randrange(size * 3 // 4)
+            radius = rng.randrange(size // 20, size // 4)
+            draw.ellipse(
+                (x - radius, y - radius, x + radius, y + radius),
+                fill=tuple(rng.choices(range(256), k=3)),
+            )
+        buffer = io.BytesIO()
+        image.filter(ImageFilter.GaussianBlur(4)).save(buffer, "JPEG", quality=90)
+        return buffer.getvalue()
+
+    def handle(self, images, size, seed, *args, **options):
+        rng = random.Random(seed)
+        photos = [self.make_photo(rng, size) for _ in range(images)]
+
+        start = time.perf_counter()
+        for photo in photos:
+            image = open_image(io.BytesIO(photo), settings.DOMINANT_COLORS_SAMPLE_SIZE)
+            extract_dominant_colors(
+                image,
+                settings.DOMINANT_COLORS_COUNT,
+                settings.DOMINANT_COLORS_SAMPLE_SIZE,
+            )
+        elapsed = time.perf_counter() - start
+
+        print(f"{images} JPEG photos of {size}px")
+        print(f"Per image: {elapsed * 1e3 / images:.2f} ms")
+        print(f"Throughput: {images / elapsed:.1f} images/s/core")
@@ -0,0 +1,71 @@
+"""
+A Django Management Command measuring the cost of signing a page of download urls.
+
+Signs the same batch of object names once blob by blob through google-cloud-storage,
+and once with the local V4 signer used by the GoogleClient. Both use a throw-away
+service-account key, so neither reaches the network.
+"""
+
+import time
+import uuid
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.management.base import BaseCommand
+from google.auth import crypt
+from google.cloud import storage
+from google.oauth2 import service_account
+
+from config.storage.signer import V4UrlSigner
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks presigned url generation per blob and with the batch signer. "
+        "Usage benchmark_presigned_urls [--objects N] [--rounds N]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=50)
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument("--expiration", type=int, default=3600)
+
+    @staticmethod
+    def make_credentials() -> service_account.Credentials:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        return service_account.Credentials(
+            signer=crypt.RSASigner.from_string(pem),
+            service_account_email="benchmark@project.iam.gserviceaccount.com",
+            token_uri="https://oauth2.googleapis.com/token",
+            project_id="project",
+        )
+
+    def handle(self, objects, rounds, expiration, *args, **options):
+        credentials = self.make_credentials()
+        bucket = storage.Bucket(
+            storage.Client(project="project", credentials=credentials), "benchmark"
+        )
+        signer = V4UrlSigner(credentials, "benchmark")
+        object_names = [f"snaps/{uuid.uuid4().hex}.png" for _ in range(objects)]
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for object_name in object_names:
+                bucket.blob(object_name).generate_signed_url(
+                    version="v4", expiration=expiration, method="GET"
+                )
+        per_blob = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            signer.sign_many(object_names, expiration)
+        batched = time.perf_counter() - start
+
+        print(f"{rounds} pages of {objects} objects")
+        print(f"Per blob:     {per_blob * 1e3 / rounds:.2f} ms/page")
+        print(f"Batch signer: {batched * 1e3 / rounds:.2f} ms/page")
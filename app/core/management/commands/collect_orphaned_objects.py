@@ -0,0 +1,44 @@
+"""
+A Django Management Command deleting the objects of the bucket that no row
+references: uploads never attached to a collection, item, pending item, snap or
+user, and the images and derivatives of deleted or updated rows.
+
+The bucket listing and the referenced names are both streamed in sorted order and
+merged, so neither is held in memory nor looked up one object at a time.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.orphans import collect_orphaned_objects
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the objects no row references. "
+        "Usage collect_orphaned_objects [--grace-period SECONDS] [--batch-size N] "
+        "[--dry-run]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-period",
+            type=int,
+            default=settings.ORPHANED_OBJECT_GRACE_PERIOD,
+            help="Spare objects written more recently, e.g. uploads in progress",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Count orphans without deleting"
+        )
+
+    def handle(self, grace_period, batch_size, dry_run, *args, **options):
+        found = collect_orphaned_objects(
+            timezone.now() - timedelta(seconds=grace_period), batch_size, dry_run
+        )
+        self.stdout.write(
+            f"{found} orphaned objects {'found' if dry_run else 'deleted'}"
+        )
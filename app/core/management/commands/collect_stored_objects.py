@@ -0,0 +1,29 @@
+"""
+A Django Management Command deleting the content-addressed objects that no
+collection, item, pending item, snap or user points to anymore.
+
+Objects are only deleted once unreferenced for the grace period, so that a row
+moved from one object to another does not lose bytes another row is about to use.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.tasks import collect_stored_objects
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes unreferenced stored objects. "
+        "Usage collect_stored_objects [--grace-period SECONDS] [--batch-size N]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-period", type=int, default=settings.STORED_OBJECT_GRACE_PERIOD
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, grace_period, batch_size, *args, **options):
+        collected = collect_stored_objects(grace_period, batch_size)
+        self.stdout.write(f"{collected} stored objects deleted")
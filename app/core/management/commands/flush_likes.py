@@ -0,0 +1,24 @@
+"""
+A Django Management Command writing the likes buffered in Redis to Postgres.
+
+With LIKE_WRITE_BEHIND, votes only reach the Like table, the lists of likes and the
+counters of the snaps when flushed. Celery beat runs the flush every
+LIKE_FLUSH_INTERVAL seconds, this command flushes on demand.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.tasks import flush_likes
+
+
+class Command(BaseCommand):
+    help = "Writes buffered likes to Postgres. Usage flush_likes [--batch-size N]"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.LIKE_FLUSH_BATCH_SIZE
+        )
+
+    def handle(self, batch_size, *args, **options):
+        self.stdout.write(f"{flush_likes(batch_size)} likes flushed")
@@ -0,0 +1,26 @@
+"""
+A Django Management Command fixing the drift of the denormalized counters.
+
+Collections count their items, items their snaps and snaps their likes and
+dislikes. Model saves and deletions keep the counters up to date, but bulk writes
+skip them.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes drifted counters. Usage reconcile_counters [--dry-run]"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Count drifted rows without fixing"
+        )
+
+    def handle(self, dry_run, *args, **options):
+        for counter, drifted in reconcile_counters(dry_run=dry_run).items():
+            self.stdout.write(
+                f"{counter}: {drifted} rows {'drifted' if dry_run else 'fixed'}"
+            )
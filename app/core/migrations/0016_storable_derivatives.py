@@ -0,0 +1,33 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_remove_collection_unique_index_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="derivatives",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="derivatives",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="pendingitem",
+            name="derivatives",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="snap",
+            name="derivatives",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
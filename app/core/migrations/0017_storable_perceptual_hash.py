@@ -0,0 +1,33 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_storable_derivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="perceptual_hash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="perceptual_hash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="pendingitem",
+            name="perceptual_hash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="snap",
+            name="perceptual_hash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:26
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+# Frozen copy of core.images.dominant_color_lab as of this migration
+def dominant_color_lab(dominant_colors):
+    if not isinstance(dominant_colors, dict):
+        return None
+    color = dominant_colors.get("dominant") or dominant_colors.get("primary")
+    try:
+        color = color.lstrip("#")
+        if len(color) != 6:
+            return None
+        red, green, blue = (linear(int(color[i : i + 2], 16)) for i in (0, 2, 4))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+    x = (0.4124564 * red + 0.3575761 * green + 0.1804375 * blue) / 0.95047
+    y = 0.2126729 * red + 0.7151522 * green + 0.0721750 * blue
+    z = (0.0193339 * red + 0.1191920 * green + 0.9503041 * blue) / 1.08883
+    fx, fy, fz = f(x), f(y), f(z)
+    return [
+        round(116 * fy - 16, 2),
+        round(500 * (fx - fy), 2),
+        round(200 * (fy - fz), 2),
+    ]
+
+
+def linear(channel):
+    channel /= 255
+    if channel <= 0.04045:
+        return channel / 12.92
+    return ((channel + 0.055) / 1.055) ** 2.4
+
+
+def f(t):
+    return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+
+def fill_dominant_lab(apps, schema_editor):
+    for model_name in ["Collection", "Item", "PendingItem", "Snap"]:
+        model = apps.get_model("core", model_name)
+        rows = model.objects.exclude(dominant_colors__isnull=True)
+        for row in rows.only("pk", "dominant_colors").iterator():
+            lab = dominant_color_lab(row.dominant_colors)
+            if lab is not None:
+                model.objects.filter(pk=row.pk).update(dominant_lab=lab)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_storable_perceptual_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="dominant_lab",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(), blank=True, null=True, size=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="dominant_lab",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(), blank=True, null=True, size=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="pendingitem",
+            name="dominant_lab",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(), blank=True, null=True, size=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="snap",
+            name="dominant_lab",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(), blank=True, null=True, size=3
+            ),
+        ),
+        migrations.RunPython(fill_dominant_lab, migrations.RunPython.noop),
+    ]
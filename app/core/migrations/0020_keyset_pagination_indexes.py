@@ -0,0 +1,44 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:35
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking writes, which cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ("core", "0019_storedobject"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="collection",
+            index=models.Index(
+                fields=["created_at", "id"], name="collection_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="item",
+            index=models.Index(
+                fields=["collection", "created_at", "id"], name="item_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="like",
+            index=models.Index(
+                fields=["snap", "created_at", "id"], name="like_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="snap",
+            index=models.Index(fields=["created_at", "id"], name="snap_created_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="snap",
+            index=models.Index(
+                fields=["item", "created_at", "id"], name="snap_item_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def counted(model, foreign_key, **filters):
+    rows = (
+        model.objects.filter(**{foreign_key: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(foreign_key)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def fill_counters(apps, schema_editor):
+    collection, item, snap, like = (
+        apps.get_model("core", name) for name in ["Collection", "Item", "Snap", "Like"]
+    )
+    collection.objects.update(nb_items=counted(item, "collection"))
+    item.objects.update(nb_snaps=counted(snap, "item"))
+    snap.objects.update(
+        nb_likes=counted(like, "snap", liked=True),
+        nb_dislikes=counted(like, "snap", liked=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="nb_items",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="nb_snaps",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="snap",
+            name="nb_dislikes",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="snap",
+            name="nb_likes",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 
 from core.enums import PendingItemStatus
 from core.models.common import Identifiable, Representable, Storable, Traceable
 from userauth.models import User
 
 
+def add_to_counters(model: type[models.Model], pk, **deltas: int):
+    """Shifts counter columns of a row in the database, safe from concurrent writes"""
+    model.objects.filter(pk=pk).update(
+        **{name: F(name) + delta for name, delta in deltas.items() if delta}
+    )
+
+
 class Collection(Identifiable, Representable, Traceable, Storable):
     creator = models.ForeignKey(
         User,
@@ -13,6 +24,8 @@ class Collection(Identifiable, Representable, Traceable, Storable):
         blank=True,
         related_name="collections",
     )
+    # Counters maintained along with the rows they count, see reconcile_counters
+    nb_items = models.IntegerField(default=0)
 
     def __str__(self):
         return f"Collection {self.name} created by {self.creator}"
@@ -24,6 +37,10 @@ class Collection(Identifiable, Representable, Traceable, Storable):
                 name="unique_collection_name",
             ),
         ]
+        # Keyset pagination, see core.pagination
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="collection_created_idx")
+        ]
 
 
 class AbstractItem(Identifiable, Representable, Traceable, Storable):
@@ -35,6 +52,14 @@ class Item(AbstractItem):
     collection = models.ForeignKey(
         Collection, on_delete=models.CASCADE, related_name="items"
     )
+    nb_snaps = models.IntegerField(default=0)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding:
+                add_to_counters(Collection, self.collection_id, nb_items=1)
 
     def __str__(self):
         return f"Item {self.name} of {self.collection}"
@@ -46,6 +71,11 @@ class Item(AbstractItem):
                 name="unique_item_collection_name",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["collection", "created_at", "id"], name="item_created_idx"
+            )
+        ]
 
 
 class PendingItem(AbstractItem):
@@ -72,6 +102,15 @@ class Snap(Identifiable, Traceable, Storable):
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="snaps")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="snaps")
     comment = models.CharField(max_length=255)
+    nb_likes = models.IntegerField(default=0)
+    nb_dislikes = models.IntegerField(default=0)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding:
+                add_to_counters(Item, self.item_id, nb_snaps=1)
 
     def __str__(self):
         return f"Snap of {self.user} on {self.item}"
@@ -83,6 +122,12 @@ class Snap(Identifiable, Traceable, Storable):
                 name="unique_item_user",
             ),
         ]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="snap_created_idx"),
+            models.Index(
+                fields=["item", "created_at", "id"], name="snap_item_created_idx"
+            ),
+        ]
 
 
 class Like(Traceable):
@@ -90,6 +135,74 @@ class Like(Traceable):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="likes")
     liked = models.BooleanField(default=True)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self._state.adding:
+                super().save(*args, **kwargs)
+                add_to_counters(Snap, self.snap_id, **{like_counter(self.liked): 1})
+                return
+
+            # Only the write that actually flips the row moves the counters, even
+            # when the same like is toggled concurrently
+            flipped = Like.objects.filter(pk=self.pk, liked=not self.liked).update(
+                liked=self.liked
+            )
+            super().save(*args, **kwargs)
+            if flipped:
+                add_to_counters(
+                    Snap,
+                    self.snap_id,
+                    **{like_counter(self.liked): 1, like_counter(not self.liked): -1},
+                )
+
+    @classmethod
+    def vote(cls, snap_id, user: User, liked: bool) -> "Like":
+        """
+        Creates or updates the like of the user on the snap, and moves the counters
+        of the snap, in a single statement. The upsert locks the row it conflicts
+        with, so concurrent votes of the same user are applied one after the other.
+        updated_at only changes when the vote does, which tells the counter update
+        whether there is anything to move.
+        """
+        sql = f"""
+            WITH upserted AS (
+                INSERT INTO {cls._meta.db_table} AS l
+                    (snap_id, user_id, liked, created_at, updated_at)
+                SELECT s.id, %(user_id)s, %(liked)s, %(now)s, %(now)s
+                FROM {Snap._meta.db_table} s
+                WHERE s.id = %(snap_id)s
+                ON CONFLICT ON CONSTRAINT unique_like_user_snap DO UPDATE SET
+                    liked = EXCLUDED.liked,
+                    updated_at = CASE
+                        WHEN l.liked = EXCLUDED.liked THEN l.updated_at
+                        ELSE EXCLUDED.updated_at
+                    END
+                RETURNING l.*, l.xmax = 0 AS created
+            ), counted AS (
+                UPDATE {Snap._meta.db_table} s SET
+                    nb_likes = nb_likes + CASE
+                        WHEN u.liked THEN 1 WHEN u.created THEN 0 ELSE -1
+                    END,
+                    nb_dislikes = nb_dislikes + CASE
+                        WHEN NOT u.liked THEN 1 WHEN u.created THEN 0 ELSE -1
+                    END
+                FROM upserted u
+                WHERE s.id = u.snap_id AND u.updated_at = %(now)s
+            )
+            SELECT id, snap_id, user_id, liked, created_at, updated_at FROM upserted
+        """
+        params = {
+            "snap_id": snap_id,
+            "user_id": user.pk,
+            "liked": liked,
+            "now": timezone.now(),
+        }
+        likes = list(cls.objects.raw(sql, params))
+        if not likes:
+            raise Snap.DoesNotExist("Snap matching query does not exist.")
+        likes[0].user = user
+        return likes[0]
+
     def __str__(self):
         like = "Like" if self.liked else "Dislike"
         return f"{like} by {self.user} on {self.snap}"
@@ -101,3 +214,39 @@ class Like(Traceable):
                 name="unique_like_user_snap",
             ),
         ]
+        indexes = [
+            models.Index(fields=["snap", "created_at", "id"], name="like_created_idx")
+        ]
+
+
+def like_counter(liked: bool) -> str:
+    return "nb_likes" if liked else "nb_dislikes"
+
+
+def deleted_from(origin, *ancestors: type[models.Model]) -> bool:
+    """
+    Whether a deletion started from rows of one of the ancestors, which the cascade
+    deletes the counting parent with, so that its counter is left alone
+    """
+    model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return issubclass(model, ancestors)
+
+
+# Deletions, cascades included, run in a transaction that also moves the counters.
+# Receivers prevent fast deletes, so they must not query for each row of a cascade.
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance: Item, origin=None, **kwargs):
+    if not deleted_from(origin, Collection):
+        add_to_counters(Collection, instance.collection_id, nb_items=-1)
+
+
+@receiver(post_delete, sender=Snap)
+def snap_deleted(sender, instance: Snap, origin=None, **kwargs):
+    if not deleted_from(origin, Item, Collection):
+        add_to_counters(Item, instance.item_id, nb_snaps=-1)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance: Like, origin=None, **kwargs):
+    if not deleted_from(origin, Snap, Item, Collection):
+        add_to_counters(Snap, instance.snap_id, **{like_counter(instance.liked): -1})
@@ -1,8 +1,20 @@
+import os
 import uuid
+from functools import partial
+from typing import Iterable
 
-from django.db import models
+from django.apps import apps
+from django.contrib.postgres.fields import ArrayField
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import class_prepared, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 
 from config.external_client import s3_client
+from core.images import dominant_color_lab
+from core.tasks import intern_object
 
 
 class Identifiable(models.Model):
@@ -20,6 +32,77 @@ class Traceable(models.Model):
         abstract = True
 
 
+class StoredObject(Traceable):
+    """
+    Bytes stored once under the hash of their content, shared by every storable
+    whose object_name points to them. Objects that stayed unreferenced for a grace
+    period are deleted by collect_stored_objects.
+    """
+
+    PREFIX = "objects/"
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    object_name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    # Storables pointing to the object, maintained by Storable.save and deletions
+    ref_count = models.IntegerField(default=0)
+
+    @classmethod
+    def content_object_name(cls, sha256: str, uploaded_name: str) -> str:
+        """Name of the bytes of an upload, keeping its extension for content types"""
+        extension = os.path.splitext(uploaded_name)[1].lower()
+        return f"{cls.PREFIX}{sha256}{extension}"
+
+    @classmethod
+    def is_content_addressed(cls, object_name: str | None) -> bool:
+        return bool(object_name) and object_name.startswith(cls.PREFIX)
+
+    @classmethod
+    def retain(cls, object_name: str):
+        updated = cls.objects.filter(object_name=object_name).update(
+            ref_count=F("ref_count") + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            # Unknown or already collected
+            raise ValidationError({"object_name": [f"Unknown object {object_name}"]})
+
+    @classmethod
+    def release(cls, object_name: str):
+        # Restarts the grace period of objects that become unreferenced
+        cls.objects.filter(object_name=object_name).update(
+            ref_count=F("ref_count") - 1, updated_at=timezone.now()
+        )
+
+    def __str__(self):
+        return f"Stored object {self.object_name} ({self.ref_count} references)"
+
+
+class InternedUpload(models.Model):
+    """
+    Upload moved to a stored object by intern_object. Responses sent before the
+    move carry the upload name, which clients may send back unchanged.
+    """
+
+    object_name = models.CharField(max_length=255, primary_key=True)
+    stored_object = models.ForeignKey(
+        StoredObject, on_delete=models.CASCADE, related_name="uploads"
+    )
+
+    @classmethod
+    def interned_as(cls, upload_name: str | None, object_name: str | None) -> bool:
+        """Whether the upload was moved to the stored object of that name"""
+        if StoredObject.is_content_addressed(upload_name) or not (
+            upload_name and StoredObject.is_content_addressed(object_name)
+        ):
+            return False
+        return cls.objects.filter(
+            object_name=upload_name, stored_object__object_name=object_name
+        ).exists()
+
+    def __str__(self):
+        return f"Upload {self.object_name} interned as {self.stored_object_id}"
+
+
 class Representable(models.Model):
     name = models.CharField(max_length=255)
     description = models.CharField(max_length=255)
@@ -35,12 +118,131 @@ class Storable(models.Model):
         max_length=255,
     )
     dominant_colors = models.JSONField(null=True, blank=True)
+    # CIE Lab coordinates of the dominant color, searchable unlike the JSON above
+    dominant_lab = ArrayField(models.FloatField(), size=3, null=True, blank=True)
+    # Object names of the resized WebP copies of the image, by size name
+    derivatives = models.JSONField(null=True, blank=True)
+    # 64-bit difference hash of the image, see core.duplicates
+    perceptual_hash = models.BigIntegerField(null=True, blank=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_object_name = instance.__dict__.get("object_name")
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        stored_object_name = getattr(self, "_stored_object_name", None)
+        if self.object_name != stored_object_name and InternedUpload.interned_as(
+            self.object_name, stored_object_name
+        ):
+            # The image is unchanged, its upload is gone since it was interned
+            self.object_name = stored_object_name
+        self.dominant_lab = dominant_color_lab(self.dominant_colors)
+        if update_fields is not None and "dominant_colors" in update_fields:
+            kwargs["update_fields"] = update_fields = {*update_fields, "dominant_lab"}
+        replaced = self.object_name != getattr(self, "_stored_object_name", None) and (
+            update_fields is None or "object_name" in update_fields
+        )
+        if replaced:
+            self.derivatives = None
+            self.perceptual_hash = None
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "derivatives",
+                    "perceptual_hash",
+                }
+
+        with transaction.atomic():
+            if replaced:
+                if StoredObject.is_content_addressed(self.object_name):
+                    StoredObject.retain(self.object_name)
+                if StoredObject.is_content_addressed(stored_object_name):
+                    StoredObject.release(stored_object_name)
+            super().save(*args, **kwargs)
+
+        if replaced and self.object_name:
+            transaction.on_commit(
+                partial(intern_object.delay, self._meta.label, str(self.pk))
+            )
+        self._stored_object_name = self.object_name
 
     @property
     def presigned_url(self):
         if not self.object_name:
             return None
+        # Set by prefill_presigned_urls when resolved in batch
+        presigned_url = getattr(self, "_presigned_url", None)
+        if presigned_url is not None:
+            return presigned_url
         return s3_client.generate_presigned_url(self.object_name)
 
+    @property
+    def derivative_urls(self) -> dict[str, str] | None:
+        if not self.derivatives:
+            return None
+        # Set by prefill_presigned_urls when resolved in batch
+        derivative_urls = getattr(self, "_derivative_urls", None)
+        if derivative_urls is not None:
+            return derivative_urls
+        presigned_urls = s3_client.generate_presigned_urls(
+            list(self.derivatives.values())
+        )
+        return {
+            size_name: presigned_urls[object_name]
+            for size_name, object_name in self.derivatives.items()
+        }
+
     class Meta:
         abstract = True
+
+
+def release_stored_object(sender, instance, **kwargs):
+    if StoredObject.is_content_addressed(instance.object_name):
+        StoredObject.release(instance.object_name)
+
+
+@receiver(class_prepared)
+def connect_storable(sender, **kwargs):
+    # Per model rather than for every model, which would prevent fast deletes
+    if issubclass(sender, Storable) and not sender._meta.abstract:
+        post_delete.connect(release_stored_object, sender=sender)
+
+
+def storable_models() -> list[type[Storable]]:
+    return [model for model in apps.get_models() if issubclass(model, Storable)]
+
+
+def prefill_presigned_urls(instances: Iterable[models.Model], relations: Iterable[str]):
+    """
+    Resolves the presigned urls of the given storables, and of the storables they
+    reference through `relations`, with a single call to the storage client.
+    """
+    storables = []
+    for instance in instances:
+        storables.append(instance)
+        storables.extend(getattr(instance, relation) for relation in relations)
+
+    storables = [
+        storable
+        for storable in storables
+        if isinstance(storable, Storable) and storable.object_name
+    ]
+    if not storables:
+        return
+
+    object_names = []
+    for storable in storables:
+        object_names.append(storable.object_name)
+        object_names.extend((storable.derivatives or {}).values())
+
+    presigned_urls = s3_client.generate_presigned_urls(object_names)
+    for storable in storables:
+        storable._presigned_url = presigned_urls.get(storable.object_name)
+        if storable.derivatives:
+            storable._derivative_urls = {
+                size_name: presigned_urls.get(object_name)
+                for size_name, object_name in storable.derivatives.items()
+            }
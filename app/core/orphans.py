@@ -0,0 +1,108 @@
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db import connection
+
+from config.external_client import s3_client
+from config.metrics import metrics
+from core.models.common import StoredObject, storable_models
+
+
+def referenced_object_names(chunk_size: int = 2000) -> Iterator[str]:
+    """
+    Object names and derivatives of every storable row, and the content-addressed
+    objects, streamed from a server-side cursor in the bytewise order of the bucket
+    listings. Names referenced several times are repeated.
+    """
+    quote = connection.ops.quote_name
+    selects = [f"SELECT object_name AS name FROM {quote(StoredObject._meta.db_table)}"]
+    for model in storable_models():
+        table = quote(model._meta.db_table)
+        selects.append(
+            f"SELECT object_name AS name FROM {table} "
+            "WHERE object_name IS NOT NULL AND object_name <> ''"
+        )
+        selects.append(
+            f"SELECT derivative.value AS name FROM {table}, "
+            "jsonb_each_text(derivatives) AS derivative "
+            "WHERE jsonb_typeof(derivatives) = 'object'"
+        )
+    sql = (
+        f"SELECT name FROM ({' UNION ALL '.join(selects)}) AS referenced "
+        'ORDER BY name COLLATE "C"'
+    )
+
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql)
+        while rows := cursor.fetchmany(chunk_size):
+            for (name,) in rows:
+                yield name
+
+
+def sorted_difference(names: Iterable[str], excluded: Iterable[str]) -> Iterator[str]:
+    """Names not in `excluded`, both sorted, in a single pass over each"""
+    excluded = iter(excluded)
+    current = next(excluded, None)
+    for name in names:
+        while current is not None and current < name:
+            current = next(excluded, None)
+        if name != current:
+            yield name
+
+
+def unreferenced(object_names: list[str]) -> list[str]:
+    """
+    The object names that no row points to, as an object name or a derivative,
+    checked again right before deletion
+    """
+    referenced = set(
+        StoredObject.objects.filter(object_name__in=object_names).values_list(
+            "object_name", flat=True
+        )
+    )
+    quote = connection.ops.quote_name
+    for model in storable_models():
+        referenced.update(
+            model.objects.filter(object_name__in=object_names).values_list(
+                "object_name", flat=True
+            )
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT derivative.value FROM {quote(model._meta.db_table)}, "
+                "jsonb_each_text(derivatives) AS derivative "
+                "WHERE jsonb_typeof(derivatives) = 'object' "
+                "AND derivative.value = ANY(%s)",
+                [object_names],
+            )
+            referenced.update(name for (name,) in cursor.fetchall())
+    return [name for name in object_names if name not in referenced]
+
+
+def collect_orphaned_objects(
+    updated_before: datetime, batch_size: int = 1000, dry_run: bool = False
+) -> int:
+    """
+    Deletes the objects of the bucket that no row references and that were last
+    written before `updated_before`, which spares uploads not attached yet.
+    Returns how many orphans were found.
+    """
+    listed = (
+        name for name, updated in s3_client.list_objects() if updated < updated_before
+    )
+    orphans = sorted_difference(listed, referenced_object_names())
+
+    found = 0
+    while batch := list(islice(orphans, batch_size)):
+        batch = unreferenced(batch)
+        found += len(batch)
+        if not dry_run:
+            with metrics.timer("storage.delete_orphans"):
+                s3_client.delete_objects(
+                    batch, max_workers=settings.STORAGE_MAX_CONNECTIONS
+                )
+    if not dry_run:
+        metrics.increment("storage.orphans_deleted", found)
+    return found
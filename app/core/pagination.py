@@ -0,0 +1,110 @@
+import base64
+import binascii
+from typing import Any, List, Optional
+
+import orjson
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from ninja import Field, Schema
+from ninja.pagination import PaginationBase
+
+from core.exceptions import IncoherentInput
+
+DEFAULT_ORDERING = ("created_at",)
+
+
+def encode_cursor(ordering: list[str], values: list[Any]) -> str:
+    payload = orjson.dumps({"o": ordering, "v": values}, default=str)
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[list[str], list[Any]]:
+    try:
+        payload = orjson.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+        return payload["o"], payload["v"]
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError):
+        raise IncoherentInput(detail={"cursor": "Invalid cursor"})
+
+
+class KeysetPagination(PaginationBase):
+    """
+    Pages that start after the last row of the previous one, found through an
+    opaque cursor holding that row's ordering values instead of an offset.
+
+    Each page is a range scan of at most `limit` rows of an index on the ordering,
+    however deep the client scrolls. The primary key breaks ties, so that rows
+    sharing the same ordering values are neither repeated nor skipped.
+    """
+
+    class Input(Schema):
+        limit: int = Field(
+            settings.PAGINATION_DEFAULT_LIMIT, ge=1, le=settings.PAGINATION_MAX_LIMIT
+        )
+        cursor: Optional[str] = None
+
+    class Output(Schema):
+        items: List[Any]
+        next_cursor: Optional[str]
+
+    def paginate_queryset(self, queryset: QuerySet, pagination: Input, **params):
+        ordering = [str(key) for key in queryset.query.order_by] or list(
+            DEFAULT_ORDERING
+        )
+        if ordering[-1].lstrip("-") not in ("pk", "id"):
+            # Same direction as the last key, so that one index serves the ordering
+            ordering.append("-pk" if ordering[-1].startswith("-") else "pk")
+        queryset = queryset.order_by(*ordering)
+        immediate, deferred = queryset.query.deferred_loading
+        if immediate and not deferred:
+            # Loads the ordering keys that the next cursor is made of
+            keys = [key.lstrip("-") for key in ordering]
+            queryset = queryset.only(*immediate, *(key for key in keys if key != "pk"))
+
+        if pagination.cursor is not None:
+            cursor_ordering, values = decode_cursor(pagination.cursor)
+            if cursor_ordering != ordering or len(values) != len(ordering):
+                raise IncoherentInput(
+                    detail={"cursor": "The cursor belongs to another ordering"}
+                )
+            queryset = queryset.filter(self.after(queryset.model, ordering, values))
+
+        items = list(queryset[: pagination.limit + 1])
+        next_cursor = None
+        if len(items) > pagination.limit:
+            items = items[: pagination.limit]
+            next_cursor = encode_cursor(
+                ordering,
+                [getattr(items[-1], key.lstrip("-")) for key in ordering],
+            )
+        return {"items": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    def after(model, ordering: list[str], values: list[Any]) -> Q:
+        """
+        Rows coming after `values` in the ordering: beyond them on a key and equal
+        on the keys before it
+        """
+        keys = []
+        for key, value in zip(ordering, values):
+            name = key.lstrip("-")
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+            try:
+                value = field.to_python(value)
+            except (ValidationError, ValueError, TypeError):
+                raise IncoherentInput(detail={"cursor": "Invalid cursor"})
+            keys.append((name, "lt" if key.startswith("-") else "gt", value))
+
+        name, lookup, value = keys[-1]
+        condition = Q(**{f"{name}__{lookup}": value})
+        for name, lookup, value in reversed(keys[:-1]):
+            condition = Q(**{f"{name}__{lookup}": value}) | (
+                Q(**{name: value}) & condition
+            )
+
+        # Redundant bound on the first key, so that the index scan starts at the
+        # cursor instead of filtering the rows before it
+        name, lookup, value = keys[0]
+        return Q(**{f"{name}__{lookup}e": value}) & condition
@@ -0,0 +1,74 @@
+from typing import Type
+
+from django.db.models import Model, Prefetch, QuerySet
+from ninja import Schema
+
+
+def declared(schema: Type[Schema], attribute: str) -> list[str]:
+    """Names declared by the schema and its bases under `attribute`, in order"""
+    names = []
+    for klass in reversed(schema.__mro__):
+        for name in klass.__dict__.get(attribute, ()):
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def load_plan(
+    model: Type[Model], schema: Type[Schema], prefix: str = ""
+) -> tuple[list[str], list[Prefetch], list[str]]:
+    """
+    The select_related, prefetch_related and only() arguments that load every
+    column and relation the schema reads from instances of the model.
+
+    Columns are the schema fields matching a model field, or the attname of a
+    foreign key, plus the model fields listed in its `columns`, read by computed
+    fields. Relations listed in its `related` are joined when they point to one
+    row, prefetched otherwise, and loaded for their own nested schema.
+    """
+    fields = {}
+    for field in model._meta.concrete_fields:
+        fields[field.name] = fields[field.attname] = field
+
+    only = {prefix + model._meta.pk.name}
+    for name in [*schema.__fields__, *declared(schema, "columns")]:
+        if name in fields:
+            only.add(prefix + fields[name].name)
+
+    select_related, prefetch_related = [], []
+    for name in declared(schema, "related"):
+        field = model._meta.get_field(name)
+        nested = schema.__fields__[name].type_
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            select_related.append(prefix + name)
+            only.add(prefix + name)
+            nested_plan = load_plan(field.related_model, nested, f"{prefix}{name}__")
+            select_related += nested_plan[0]
+            prefetch_related += nested_plan[1]
+            only.update(nested_plan[2])
+        else:
+            nested_plan = load_plan(field.related_model, nested)
+            if field.one_to_many:
+                # Matches the prefetched rows to their parent
+                nested_plan[2].append(field.field.name)
+            queryset = planned(field.related_model.objects.all(), *nested_plan)
+            prefetch_related.append(Prefetch(prefix + name, queryset=queryset))
+    return select_related, prefetch_related, sorted(only)
+
+
+def planned(
+    queryset: QuerySet,
+    select_related: list[str],
+    prefetch_related: list[Prefetch],
+    only: list[str],
+) -> QuerySet:
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset.only(*only)
+
+
+def apply_load_plan(queryset: QuerySet, schema: Type[Schema]) -> QuerySet:
+    """Loads what the schema serializes in a constant number of queries"""
+    return planned(queryset, *load_plan(queryset.model, schema))
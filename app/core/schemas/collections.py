@@ -1,9 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import ClassVar, Optional
 from uuid import UUID
 
 from ninja import FilterSchema, Schema
 
+from core.duplicates import find_duplicates
 from core.schemas.common import (
     IdentifiableOutput,
     OptionalStorableInput,
@@ -27,7 +28,11 @@ class LikeInput(Schema):
 
 
 class LikeOutput(Schema):
-    id: int
+    # Relations and extra columns loaded with the rows, see core.prefetch
+    related: ClassVar[tuple[str, ...]] = ("user",)
+
+    # Null until flushed, when votes are buffered, see core.likes
+    id: Optional[int]
     user: UserOutput
     liked: bool
 
@@ -40,21 +45,39 @@ class SnapInput(StorableInput):
 
 
 class SnapOutput(IdentifiableOutput, StorableOutput):
+    related: ClassVar[tuple[str, ...]] = ("user",)
+
     item_id: UUID
     created_at: datetime
     user: UserOutput
     comment: str
 
-    nb_likes: Optional[int] = 0
-    nb_dislikes: Optional[int] = 0
+    nb_likes: int
+    nb_dislikes: int
 
 
 # ======================================================================================
 # Item
 # ======================================================================================
+class DuplicateOutput(Schema):
+    id: UUID
+    name: str
+    kind: str
+    distance: int
+
+
 class PendingItemSchema(IdentifiableOutput, RepresentableOutput, StorableOutput):
+    related: ClassVar[tuple[str, ...]] = ("creator",)
+    # Read by find_duplicates
+    columns: ClassVar[tuple[str, ...]] = ("collection", "perceptual_hash")
+
     created_at: datetime
     creator: UserOutput
+    duplicates: list[DuplicateOutput] = []
+
+    @staticmethod
+    def resolve_duplicates(obj):
+        return find_duplicates(obj)
 
 
 class ItemInput(RepresentableOutput, StorableInput):
@@ -66,11 +89,13 @@ class ItemUpdate(RepresentableOutput, StorableInput):
 
 
 class ItemOutput(IdentifiableOutput, RepresentableOutput, StorableOutput):
+    related: ClassVar[tuple[str, ...]] = ()
+
     created_at: datetime
     dominant_colors: Optional[dict]
 
     presigned_url: str
-    nb_snaps: Optional[int] = 0
+    nb_snaps: int
 
 
 # ======================================================================================
@@ -81,7 +106,9 @@ class CollectionInput(RepresentableOutput, OptionalStorableInput):
 
 
 class CollectionOutput(IdentifiableOutput, RepresentableOutput, OptionalStorableOutput):
+    related: ClassVar[tuple[str, ...]] = ("creator",)
+
     created_at: datetime
     creator: UserOutput
 
-    nb_items: Optional[int] = 0
+    nb_items: int
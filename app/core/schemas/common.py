@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import ClassVar, List, Optional
 from uuid import UUID
 
+from django.db.models import Q
 from ninja import FilterSchema, Schema
+from pydantic import validator
 
 
 class ErrorOutput(Schema):
@@ -48,14 +50,40 @@ class OptionalStorableInput(BaseStorable):
 
 
 class StorableOutput(BaseStorable):
+    # Read by derivative_urls, see core.prefetch
+    columns: ClassVar[tuple[str, ...]] = ("derivatives",)
+
     object_name: str
     presigned_url: str
+    derivative_urls: Optional[dict[str, str]]
 
 
 class OptionalStorableOutput(BaseStorable):
+    # Read by derivative_urls, see core.prefetch
+    columns: ClassVar[tuple[str, ...]] = ("derivatives",)
+
     object_name: Optional[str]
     presigned_url: Optional[str]
+    derivative_urls: Optional[dict[str, str]]
 
 
 class OrderableQuery(FilterSchema):
+    # Keys that lists can be ordered, and paginated, by: ascending or "-" descending
+    orderable_fields: ClassVar[set[str]] = {"created_at", "updated_at"}
+
     order_by: Optional[List[str]]
+
+    @validator("order_by")
+    def validate_order_by(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        for key in value or []:
+            if key.lstrip("-") not in cls.orderable_fields:
+                raise ValueError(f"Cannot order by {key}")
+        return value
+
+    def filter_order_by(self, value: Optional[List[str]]) -> Q:
+        # Applied as the ordering of the list rather than as a filter
+        return Q()
+
+
+class NamedOrderableQuery(OrderableQuery):
+    orderable_fields: ClassVar[set[str]] = {*OrderableQuery.orderable_fields, "name"}
@@ -0,0 +1,316 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from google.api_core.exceptions import GoogleAPIError
+from PIL import UnidentifiedImageError
+
+from config.external_client import s3_client
+from config.metrics import metrics
+from core.duplicates import to_signed
+from core.images import (
+    difference_hash,
+    dominant_color_lab,
+    extract_dominant_colors,
+    open_image,
+    render_derivatives,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def derivative_object_name(object_name: str, size_name: str) -> str:
+    return f"{object_name}.{size_name}.webp"
+
+
+def load_image(object_name: str, max_size: int):
+    """Streams and decodes a stored image, or returns None if it cannot be read"""
+    try:
+        with metrics.timer("images.load"), s3_client.open_object(object_name) as file:
+            return open_image(file, max_size)
+    except (FileNotFoundError, UnidentifiedImageError):
+        logger.warning(f"Cannot read image {object_name}")
+        metrics.increment("images.failed")
+        return None
+
+
+def invalidate_cached_user(model, pk: str):
+    """Drops the cached copies of a user whose row was written with update()"""
+    if model._meta.label == settings.AUTH_USER_MODEL:
+        from config.authentication import user_cache
+
+        user_cache.invalidate_many([pk])
+
+
+def hash_object(object_name: str) -> tuple[str, int] | None:
+    """SHA-256 and size of a stored object, streamed, or None if it is missing"""
+    digest, size = hashlib.sha256(), 0
+    try:
+        with metrics.timer("storage.hash"):
+            for chunk in s3_client.iter_object(object_name):
+                digest.update(chunk)
+                size += len(chunk)
+    except FileNotFoundError:
+        logger.warning(f"Cannot read object {object_name}")
+        return None
+    return digest.hexdigest(), size
+
+
+@shared_task(
+    autoretry_for=(GoogleAPIError, ConnectionError),
+    retry_backoff=True,
+    max_retries=3,
+)
+def intern_object(model_label: str, pk: str):
+    """
+    Moves a storable's upload under the hash of its content, reusing the bytes of
+    an identical image stored before, then processes the image.
+    """
+    model = apps.get_model(model_label)
+    stored_object = apps.get_model("core.StoredObject")
+    object_name = (
+        model.objects.filter(pk=pk).values_list("object_name", flat=True).first()
+    )
+    if not object_name:
+        return
+
+    if not stored_object.is_content_addressed(object_name):
+        hashed = hash_object(object_name)
+        if hashed is None:
+            return
+        sha256, size = hashed
+
+        with transaction.atomic():
+            # Waits for a collection of the same hash, which deletes its bytes, and
+            # retains the row so that the next ones leave it alone while copying
+            stored, created = stored_object.objects.select_for_update().get_or_create(
+                sha256=sha256,
+                defaults={
+                    "object_name": stored_object.content_object_name(
+                        sha256, object_name
+                    ),
+                    "size": size,
+                },
+            )
+            if not created:
+                stored_object.objects.filter(pk=sha256).update(
+                    updated_at=timezone.now()
+                )
+        metrics.increment(f"storage.dedup.{'miss' if created else 'hit'}")
+        if created or stored.ref_count <= 0:
+            # Unreferenced bytes may have been deleted by a failed collection. Their
+            # name derives from the hash, so copying them twice is harmless.
+            s3_client.copy_object(object_name, stored.object_name)
+
+        with transaction.atomic():
+            if not stored_object.objects.select_for_update().filter(pk=sha256).exists():
+                # Collected during a copy slower than the grace period
+                return intern_object(model_label, pk)
+
+            # Locks the row, so a pending item being accepted meanwhile either hands
+            # the content name to its item or is committed before the check below
+            updated = model.objects.filter(pk=pk, object_name=object_name).update(
+                object_name=stored.object_name, updated_at=timezone.now()
+            )
+            if not updated:
+                # Replaced meanwhile, its new upload is interned by another task
+                return
+            # Once committed, so that a request in between does not cache the row back
+            transaction.on_commit(partial(invalidate_cached_user, model, pk))
+            stored_object.objects.filter(pk=sha256).update(
+                ref_count=F("ref_count") + 1, updated_at=timezone.now()
+            )
+            # Clients may send back the upload name they were given before
+            apps.get_model("core.InternedUpload").objects.update_or_create(
+                object_name=object_name, defaults={"stored_object_id": sha256}
+            )
+
+            from core.models.common import storable_models
+
+            if not any(
+                other.objects.filter(object_name=object_name).exists()
+                for other in storable_models()
+            ):
+                transaction.on_commit(partial(s3_client.delete_object, object_name))
+
+    process_image(model_label, pk)
+
+
+@shared_task(
+    autoretry_for=(GoogleAPIError, ConnectionError),
+    retry_backoff=True,
+    max_retries=3,
+)
+def process_image(model_label: str, pk: str):
+    """
+    Stores the WebP derivatives of a storable's image next to it and computes its
+    dominant colors and perceptual hash, then records them unless the image was
+    replaced meanwhile.
+    """
+    model = apps.get_model(model_label)
+    object_name = (
+        model.objects.filter(pk=pk).values_list("object_name", flat=True).first()
+    )
+    if not object_name:
+        return
+
+    from core.models.common import storable_models
+
+    # Content-addressed bytes shared with a row already processed
+    for other in storable_models():
+        processed = (
+            other.objects.filter(object_name=object_name, derivatives__isnull=False)
+            .exclude(perceptual_hash__isnull=True)
+            .values("derivatives", "dominant_colors", "perceptual_hash")
+            .first()
+        )
+        if processed is not None:
+            model.objects.filter(pk=pk, object_name=object_name).update(
+                **processed,
+                dominant_lab=dominant_color_lab(processed["dominant_colors"]),
+                updated_at=timezone.now(),
+            )
+            invalidate_cached_user(model, pk)
+            metrics.increment("images.reused")
+            return
+
+    image = load_image(object_name, max(settings.IMAGE_DERIVATIVE_SIZES.values()))
+    if image is None:
+        return
+
+    with metrics.timer("images.render"):
+        rendered = render_derivatives(image, settings.IMAGE_DERIVATIVE_SIZES)
+        dominant_colors = extract_dominant_colors(
+            image, settings.DOMINANT_COLORS_COUNT, settings.DOMINANT_COLORS_SAMPLE_SIZE
+        )
+        perceptual_hash = difference_hash(image)
+
+    derivatives = {}
+    for size_name, data in rendered.items():
+        derivatives[size_name] = derivative_object_name(object_name, size_name)
+        s3_client.put_object(derivatives[size_name], data, content_type="image/webp")
+
+    model.objects.filter(pk=pk, object_name=object_name).update(
+        derivatives=derivatives,
+        dominant_colors=dominant_colors,
+        dominant_lab=dominant_color_lab(dominant_colors),
+        perceptual_hash=to_signed(perceptual_hash),
+        # Lets the collection indexes pick up the new values
+        updated_at=timezone.now(),
+    )
+    invalidate_cached_user(model, pk)
+    metrics.increment("images.processed")
+
+
+@shared_task(
+    autoretry_for=(GoogleAPIError, ConnectionError),
+    retry_backoff=True,
+    max_retries=3,
+)
+def compute_dominant_colors(model_label: str, pks: list[str]):
+    """Fills the dominant colors of a batch of storables of the same model"""
+    model = apps.get_model(model_label)
+    for pk, object_name in model.objects.filter(pk__in=pks).values_list(
+        "pk", "object_name"
+    ):
+        if not object_name:
+            continue
+        image = load_image(object_name, settings.DOMINANT_COLORS_SAMPLE_SIZE)
+        if image is None:
+            continue
+        with metrics.timer("images.dominant_colors"):
+            dominant_colors = extract_dominant_colors(
+                image,
+                settings.DOMINANT_COLORS_COUNT,
+                settings.DOMINANT_COLORS_SAMPLE_SIZE,
+            )
+        model.objects.filter(pk=pk, object_name=object_name).update(
+            dominant_colors=dominant_colors,
+            dominant_lab=dominant_color_lab(dominant_colors),
+            updated_at=timezone.now(),
+        )
+        invalidate_cached_user(model, pk)
+
+
+def collect_stored_object(sha256: str, cutoff: datetime) -> bool:
+    """Deletes a stored object unless referenced or retained since the cutoff"""
+    from core.models.common import storable_models
+
+    stored_object = apps.get_model("core.StoredObject")
+    with transaction.atomic():
+        # Retaining the object updates the row, so waits for its deletion
+        stored = (
+            stored_object.objects.select_for_update(skip_locked=True)
+            .filter(pk=sha256, ref_count__lte=0, updated_at__lt=cutoff)
+            .first()
+        )
+        if stored is None:
+            return False
+
+        references = sum(
+            model.objects.filter(object_name=stored.object_name).count()
+            for model in storable_models()
+        )
+        if references:
+            # Pointed to by rows written around the counter, e.g. by update()
+            stored_object.objects.filter(pk=sha256).update(
+                ref_count=references, updated_at=timezone.now()
+            )
+            return False
+
+        for object_name in [
+            stored.object_name,
+            *(
+                derivative_object_name(stored.object_name, size_name)
+                for size_name in settings.IMAGE_DERIVATIVE_SIZES
+            ),
+        ]:
+            try:
+                s3_client.delete_object(object_name)
+            except FileNotFoundError:
+                pass
+        stored.delete()
+        return True
+
+
+@shared_task
+def collect_stored_objects(grace_period: int, batch_size: int = 1000) -> int:
+    """
+    Deletes the stored objects, and their derivatives, that no storable has
+    referenced for `grace_period` seconds, `batch_size` candidates at a time.
+    Returns how many were deleted.
+    """
+    stored_object = apps.get_model("core.StoredObject")
+    cutoff = timezone.now() - timedelta(seconds=grace_period)
+    candidates = stored_object.objects.filter(
+        ref_count__lte=0, updated_at__lt=cutoff
+    ).order_by("pk")
+
+    collected, last = 0, None
+    while True:
+        # Walks past the candidates skipped, which would be fetched again otherwise
+        batch = candidates if last is None else candidates.filter(pk__gt=last)
+        batch = list(batch.values_list("pk", flat=True)[:batch_size])
+        for sha256 in batch:
+            collected += collect_stored_object(sha256, cutoff)
+        if len(batch) < batch_size:
+            break
+        last = batch[-1]
+
+    metrics.increment("storage.collected", collected)
+    return collected
+
+
+@shared_task
+def flush_likes(batch_size: int = 1000) -> int:
+    """Writes the likes buffered in Redis to Postgres, see core.likes"""
+    from core.likes import like_buffer
+
+    return like_buffer.flush(batch_size)
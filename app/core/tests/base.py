@@ -1,16 +1,32 @@
 import json
 import logging
+from http import HTTPStatus
+from typing import Callable, Type
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Model, QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from ninja import Schema
+from ninja_crud.tests import ListModelViewTest
 from orjson import orjson
 
-from config.authentication import JWTCoder
+from config.authentication import JWTCoder, user_cache
+from core.colors import ColorIndex
+from core.duplicates import DuplicateIndex
 from core.models.collections import Collection, Item, PendingItem, Snap
 from userauth.models import Token, User
 
 
+# Celery tasks run in-process, without a broker
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+    CELERY_BROKER_URL="memory://",
+)
 class BaseTest(TestCase):
     user_one: AbstractUser
     user_one_pwd: str
@@ -129,6 +145,14 @@ class BaseTest(TestCase):
             object_name="some object_name",
         )
 
+    def setUp(self) -> None:
+        super(BaseTest, self).setUp()
+        """Drop cached state, the database is rolled back between tests"""
+        cache.clear()
+        user_cache.local.clear()
+        DuplicateIndex.registry.clear()
+        ColorIndex.registry.clear()
+
     @classmethod
     def tearDownClass(cls) -> None:
         super(BaseTest, cls).tearDownClass()
@@ -146,6 +170,21 @@ class BaseTest(TestCase):
             json.loads(orjson.dumps(schema.dict())),
         )
 
+    def assertListQueriesConstant(self, url: str, add_rows: Callable[[], None]):
+        """Asserts that listing `url` takes as many queries once more rows exist"""
+
+        def list_queries() -> int:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, **self.auth_user_one)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            return len(context.captured_queries)
+
+        # Warms the authentication cache up
+        list_queries()
+        queries = list_queries()
+        add_rows()
+        self.assertEqual(list_queries(), queries)
+
     @staticmethod
     def _generate_auth_user(token: Token):
         token = JWTCoder.encode(id_token=token.key)
@@ -154,3 +193,27 @@ class BaseTest(TestCase):
     @staticmethod
     def _generate_auth_user_by_token(token: Token):
         return {"HTTP_AUTHORIZATION": f"Bearer {token.key}"}
+
+
+class KeysetListModelViewTest(ListModelViewTest):
+    """ListModelViewTest of a KeysetListModelView, whose pages have no count"""
+
+    def assert_content_equals_schema_list(
+        self,
+        content: dict,
+        queryset: QuerySet[Model],
+        output_schema: Type[Schema],
+        limit: int = settings.PAGINATION_DEFAULT_LIMIT,
+        offset: int = 0,
+    ):
+        self.test_case.assertIsInstance(content, dict)
+        self.test_case.assertIn("items", content)
+        self.test_case.assertIn("next_cursor", content)
+
+        count = queryset.count()
+        self.test_case.assertEqual(len(content["items"]), min(count, limit))
+        if count <= limit:
+            self.test_case.assertIsNone(content["next_cursor"])
+
+        for item in content["items"]:
+            self.assert_content_equals_schema(item, queryset, output_schema)
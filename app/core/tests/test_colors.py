@@ -0,0 +1,81 @@
+import math
+import random
+import uuid
+
+from django.urls import reverse
+
+from core.colors import ColorIndex
+from core.images import hex_to_lab
+from core.models.collections import Item
+from core.tests.base import BaseTest
+
+
+class ColorsTest(BaseTest):
+    def test_hex_to_lab(self):
+        self.assertEqual(hex_to_lab("#ffffff"), (100.0, 0.0, 0.0))
+        self.assertEqual(hex_to_lab("#ff0000"), (53.24, 80.09, 67.2))
+
+    def test_color_index_search_matches_linear_scan(self):
+        rng = random.Random(0)
+        index = ColorIndex(self.collection_1.id)
+        colors = {}
+        for _ in range(5000):
+            key = ("core.Item", uuid.uuid4())
+            colors[key] = (
+                rng.uniform(0, 100),
+                rng.uniform(-80, 80),
+                rng.uniform(-80, 80),
+            )
+            index.insert(key, colors[key])
+            index.values[key] = colors[key]
+        index.synced_at = self.collection_1.created_at
+        index.sync = lambda: None
+
+        for _ in range(20):
+            query = (rng.uniform(0, 100), rng.uniform(-80, 80), rng.uniform(-80, 80))
+            expected = sorted(
+                (math.dist(query, color), key[1]) for key, color in colors.items()
+            )[:10]
+            self.assertEqual(index.search(query, 10), expected)
+
+    def test_search_collection_items_by_color(self):
+        colors = {"item-1": "#ff0000", "item-2": "#00ff00", "item-3": "#f01010"}
+        for item in Item.objects.filter(collection=self.collection_1):
+            item.dominant_colors = {"platform": "web", "dominant": colors[item.name]}
+            item.save()
+
+        response = self.client.get(
+            reverse(
+                "api:search_collection_items_by_color",
+                kwargs={"id": self.collection_1.id},
+            ),
+            data={"color": "#ff0000", "limit": 2},
+            **self.auth_user_one,
+        )
+        self.assertEqual(
+            [item["name"] for item in response.json()], ["item-1", "item-3"]
+        )
+
+        # Deleted items give way to the next closest ones
+        Item.objects.filter(collection=self.collection_1, name="item-1").delete()
+        response = self.client.get(
+            reverse(
+                "api:search_collection_items_by_color",
+                kwargs={"id": self.collection_1.id},
+            ),
+            data={"color": "#ff0000", "limit": 2},
+            **self.auth_user_one,
+        )
+        self.assertEqual(
+            [item["name"] for item in response.json()], ["item-3", "item-2"]
+        )
+
+        response = self.client.get(
+            reverse(
+                "api:search_collection_items_by_color",
+                kwargs={"id": self.collection_1.id},
+            ),
+            data={"color": "red"},
+            **self.auth_user_one,
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,67 @@
+import random
+
+from core.duplicates import BKTree, find_duplicates, hamming_distance, to_signed
+from core.models.collections import Item, PendingItem
+from core.schemas.collections import PendingItemSchema
+from core.tests.base import BaseTest
+
+
+class DuplicatesTest(BaseTest):
+    def test_bk_tree_search_matches_linear_scan(self):
+        rng = random.Random(0)
+        hashes = [rng.getrandbits(64) for _ in range(2000)]
+        # Near duplicates of the first hashes
+        hashes += [value ^ (1 << rng.randrange(64)) for value in hashes[:200]]
+        tree = BKTree()
+        for key, value in enumerate(hashes):
+            tree.add(value, key)
+
+        for query in hashes[:50]:
+            expected = sorted(
+                (hamming_distance(query, value), key)
+                for key, value in enumerate(hashes)
+                if hamming_distance(query, value) <= 8
+            )
+            found = sorted(
+                (distance, key) for distance, _, key in tree.search(query, 8)
+            )
+            self.assertEqual(found, expected)
+
+    def test_pending_item_annotated_with_duplicates(self):
+        pending_item = self.second_collection_pending_item
+        PendingItem.objects.filter(pk=pending_item.pk).update(
+            perceptual_hash=to_signed(0xFFFF_0000_FFFF_0000)
+        )
+        Item.objects.filter(pk=self.second_collection_item_1.pk).update(
+            perceptual_hash=to_signed(0xFFFF_0000_FFFF_0001)
+        )
+        Item.objects.filter(pk=self.second_collection_item_2.pk).update(
+            perceptual_hash=to_signed(0x0000_FFFF_0000_FFFF)
+        )
+        pending_item.refresh_from_db()
+
+        self.assertEqual(
+            [
+                (duplicate.id, duplicate.kind, duplicate.distance)
+                for duplicate in PendingItemSchema.from_orm(pending_item).duplicates
+            ],
+            [(self.second_collection_item_1.id, "item", 1)],
+        )
+
+        # Inserted in the existing index on the next lookup
+        item = Item.objects.create(
+            collection=self.collection_2,
+            name="copy",
+            description="description",
+            object_name="copy",
+        )
+        Item.objects.filter(pk=item.pk).update(
+            perceptual_hash=to_signed(0xFFFF_0000_FFFF_0000)
+        )
+        self.assertEqual(
+            [
+                (duplicate["id"], duplicate["distance"])
+                for duplicate in find_duplicates(pending_item)
+            ],
+            [(item.id, 0), (self.second_collection_item_1.id, 1)],
+        )
@@ -0,0 +1,99 @@
+import io
+from http import HTTPStatus
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+
+from core.likes import LikeBuffer, like_buffer
+from core.models.collections import Like, Snap
+from core.tests.base import BaseTest
+
+
+@override_settings(LIKE_WRITE_BEHIND=True)
+class LikeBufferTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.snap = self.second_collection_item_2_snap_1
+        self.url = reverse("api:snap_like", kwargs={"id": self.snap.id})
+
+    def vote(self, liked: bool, auth: dict):
+        return self.client.put(
+            self.url,
+            data={"liked": liked},
+            content_type="application/json",
+            **auth,
+        )
+
+    def counters(self) -> tuple[int, int]:
+        return Snap.objects.values_list("nb_likes", "nb_dislikes").get(pk=self.snap.pk)
+
+    def test_reads_own_votes_before_flush(self):
+        Like.objects.create(snap=self.snap, user=self.user_one, liked=True)
+        counters = self.counters()
+
+        response = self.vote(False, self.auth_user_two)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIsNone(response.json()["id"])
+        self.assertEqual(self.vote(False, self.auth_user_one).json()["liked"], False)
+        self.assertEqual(
+            self.client.delete(self.url, **self.auth_user_one).status_code,
+            HTTPStatus.NO_CONTENT,
+        )
+
+        # Written on the next flush only
+        self.assertTrue(Like.objects.filter(user=self.user_one, liked=True).exists())
+        self.assertFalse(Like.objects.filter(user=self.user_two).exists())
+        self.assertEqual(self.counters(), counters)
+
+        response = self.client.get(self.url, **self.auth_user_two)
+        self.assertEqual(response.json()["liked"], False)
+        response = self.client.get(self.url, **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.delete(self.url, **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        stdout = io.StringIO()
+        call_command("flush_likes", stdout=stdout)
+        self.assertEqual(stdout.getvalue().strip(), "2 likes flushed")
+        self.assertFalse(Like.objects.filter(user=self.user_one).exists())
+        self.assertFalse(Like.objects.get(user=self.user_two, snap=self.snap).liked)
+        self.assertEqual(self.counters(), (counters[0] - 1, counters[1] + 1))
+
+        response = self.client.get(self.url, **self.auth_user_two)
+        self.assertEqual(response.json()["id"], Like.objects.get(user=self.user_two).id)
+
+    def test_unknown_snap(self):
+        self.url = reverse(
+            "api:snap_like", kwargs={"id": "00000000-0000-0000-0000-000000000000"}
+        )
+        self.assertEqual(
+            self.vote(True, self.auth_user_one).status_code, HTTPStatus.NOT_FOUND
+        )
+
+    def test_replays_failed_flush(self):
+        counters = self.counters()
+        self.vote(True, self.auth_user_two)
+        self.vote(False, self.auth_user_three)
+
+        with patch.object(LikeBuffer, "apply", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                like_buffer.flush(batch_size=1)
+
+        # Newer votes wait for the failed ones to be written
+        self.vote(True, self.auth_user_three)
+        self.assertEqual(
+            self.client.get(self.url, **self.auth_user_three).json()["liked"], True
+        )
+        self.assertEqual(like_buffer.flush(batch_size=1), 2)
+        self.assertFalse(Like.objects.get(user=self.user_three).liked)
+        self.assertEqual(like_buffer.flush(batch_size=1), 1)
+        self.assertTrue(Like.objects.get(user=self.user_three).liked)
+        self.assertEqual(like_buffer.flush(batch_size=1), 0)
+
+        # Replaying votes already written leaves the counters alone
+        like_buffer.record(self.snap.id, self.user_two, True)
+        self.assertEqual(like_buffer.flush(batch_size=1), 1)
+        self.assertEqual(self.counters(), (counters[0] + 2, counters[1]))
@@ -0,0 +1,83 @@
+import io
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from config.storage.local_client import LocalClient
+from core.models.collections import Item, Snap
+from core.orphans import collect_orphaned_objects, sorted_difference, unreferenced
+from core.tests.base import BaseTest
+
+
+class OrphansTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = LocalClient(directory.name, "http://testserver", "secret")
+        patcher = patch("core.orphans.s3_client", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sorted_difference(self):
+        self.assertEqual(
+            list(sorted_difference(["a", "b", "c", "d"], ["b", "b", "bb", "d", "e"])),
+            ["a", "c"],
+        )
+
+    def test_unreferenced_checks_derivatives(self):
+        # Written after the listing was compared with the rows
+        Snap.objects.filter(pk=self.second_collection_item_2_snap_1.pk).update(
+            object_name="snaps/new.png",
+            derivatives={"thumbnail": "snaps/new.png.thumbnail.webp"},
+        )
+        names = [
+            "snaps/new.png",
+            "snaps/new.png.medium.webp",
+            "snaps/new.png.thumbnail.webp",
+        ]
+        self.assertEqual(unreferenced(names), ["snaps/new.png.medium.webp"])
+
+    def test_list_objects_in_bytewise_order(self):
+        names = ["a/b.png", "a.png", "a-b.png", "a0", "b/c/d", "b/c.png", "é.png"]
+        for name in names:
+            self.storage.put_object(name, b"data")
+
+        self.assertEqual(
+            [name for name, _ in self.storage.list_objects()], sorted(names)
+        )
+        self.assertEqual(
+            [name for name, _ in self.storage.list_objects("b/")], ["b/c.png", "b/c/d"]
+        )
+
+    def test_collects_orphaned_objects(self):
+        Snap.objects.filter(pk=self.second_collection_item_2_snap_1.pk).update(
+            object_name="snaps/kept.png",
+            derivatives={"thumbnail": "snaps/kept.png.thumbnail.webp"},
+        )
+        Item.objects.filter(pk=self.second_collection_item_1.pk).update(
+            object_name="items/kept.png"
+        )
+        kept = ["items/kept.png", "snaps/kept.png", "snaps/kept.png.thumbnail.webp"]
+        orphans = ["items/deleted.png", "snaps/kept.png.medium.webp", "upload.png"]
+        for name in kept + orphans:
+            self.storage.put_object(name, b"data")
+
+        # Recent uploads may still be attached
+        self.assertEqual(
+            collect_orphaned_objects(timezone.now() - timedelta(hours=1)), 0
+        )
+
+        updated_before = timezone.now() + timedelta(seconds=1)
+        self.assertEqual(collect_orphaned_objects(updated_before, dry_run=True), 3)
+        self.assertEqual(collect_orphaned_objects(updated_before, batch_size=2), 3)
+        self.assertEqual(
+            [name for name, _ in self.storage.list_objects()], sorted(kept)
+        )
+
+        stdout = io.StringIO()
+        call_command("collect_orphaned_objects", "--grace-period", "0", stdout=stdout)
+        self.assertEqual(stdout.getvalue().strip(), "0 orphaned objects deleted")
@@ -0,0 +1,132 @@
+import io
+import tempfile
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from PIL import Image
+
+from config import external_client
+from config.storage.local_client import LocalClient
+from core.models.collections import Item
+from core.models.common import StoredObject
+from core.tasks import collect_stored_objects
+from core.tests.base import BaseTest
+
+
+class StoredObjectsTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = LocalClient(directory.name, "http://testserver", "secret")
+        image = io.BytesIO()
+        Image.new("RGB", (64, 64), "blue").save(image, "PNG")
+        self.storage.put_object("uploads/a.png", image.getvalue())
+        self.storage.put_object("uploads/b.png", image.getvalue())
+
+        patcher = patch("core.tasks.s3_client", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def attach(self, instance, object_name: str):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.object_name = object_name
+            instance.save()
+        instance.refresh_from_db()
+
+    def test_identical_uploads_share_bytes(self):
+        item_1 = self.second_collection_item_1
+        item_2 = self.second_collection_item_2
+        self.attach(item_1, "uploads/a.png")
+        self.attach(item_2, "uploads/b.png")
+
+        stored = StoredObject.objects.get()
+        self.assertEqual(stored.ref_count, 2)
+        self.assertTrue(stored.object_name.endswith(".png"))
+        self.assertEqual(item_1.object_name, stored.object_name)
+        self.assertEqual(item_2.object_name, stored.object_name)
+        self.assertEqual(item_2.derivatives, item_1.derivatives)
+        self.assertEqual(item_2.perceptual_hash, item_1.perceptual_hash)
+        # The uploads are deleted once interned
+        self.assertFalse(self.storage.path("uploads/a.png").exists())
+        self.assertFalse(self.storage.path("uploads/b.png").exists())
+
+    def test_accepted_item_shares_bytes_with_pending_item(self):
+        pending_item = self.second_collection_pending_item
+        self.attach(pending_item, "uploads/a.png")
+
+        item = Item(
+            collection=pending_item.collection,
+            name="accepted",
+            description="description",
+            object_name=pending_item.object_name,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        item.refresh_from_db()
+
+        stored = StoredObject.objects.get()
+        self.assertEqual(stored.ref_count, 2)
+        self.assertEqual(item.object_name, stored.object_name)
+        self.assertEqual(item.derivatives, pending_item.derivatives)
+
+    def test_interned_user_is_not_served_from_cache(self):
+        self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        self.attach(self.user_one, "uploads/a.png")
+
+        response = self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        self.assertEqual(
+            response.json()["object_name"], StoredObject.objects.get().object_name
+        )
+
+    def test_mock_storage_keeps_uploads(self):
+        item = self.second_collection_item_1
+        with patch("core.tasks.s3_client", external_client.s3_client):
+            self.attach(item, "uploads/a.png")
+
+        self.assertEqual(item.object_name, "uploads/a.png")
+        self.assertFalse(StoredObject.objects.exists())
+
+    def test_unknown_content_object_is_rejected(self):
+        item = self.second_collection_item_1
+        item.object_name = f"{StoredObject.PREFIX}unknown.png"
+        with self.assertRaises(ValidationError):
+            item.save()
+
+    def test_collects_unreferenced_objects(self):
+        item = self.second_collection_item_1
+        self.attach(item, "uploads/a.png")
+        object_name = item.object_name
+
+        # Drifted counters are repaired instead of deleting referenced bytes
+        StoredObject.objects.update(ref_count=0)
+        self.assertEqual(collect_stored_objects(grace_period=0), 0)
+        self.assertEqual(StoredObject.objects.get().ref_count, 1)
+
+        item.delete()
+        self.assertEqual(StoredObject.objects.get().ref_count, 0)
+        self.assertEqual(collect_stored_objects(grace_period=3600), 0)
+
+        self.assertEqual(collect_stored_objects(grace_period=0), 1)
+        self.assertFalse(StoredObject.objects.exists())
+        self.assertFalse(self.storage.path(object_name).exists())
+        self.assertFalse(self.storage.path(f"{object_name}.thumbnail.webp").exists())
+
+    def test_collection_walks_past_skipped_candidates(self):
+        for sha256 in ["a" * 64, "b" * 64]:
+            StoredObject.objects.create(
+                sha256=sha256,
+                object_name=StoredObject.content_object_name(sha256, ".png"),
+                size=1,
+            )
+        # Referenced around the counter, so recounted rather than deleted
+        Item.objects.filter(pk=self.second_collection_item_1.pk).update(
+            object_name=StoredObject.content_object_name("a" * 64, ".png")
+        )
+
+        self.assertEqual(collect_stored_objects(grace_period=0, batch_size=1), 1)
+        self.assertEqual(
+            list(StoredObject.objects.values_list("sha256", "ref_count")),
+            [("a" * 64, 1)],
+        )
@@ -1,6 +1,10 @@
+from functools import wraps
+
 from django.db import models
 from ninja import Schema
 
+from core.models.common import prefill_presigned_urls
+
 
 def update_object_from_schema(updated_object: models.Model, payload: Schema):
     for attr, value in payload.dict().items():
@@ -8,3 +12,21 @@ def update_object_from_schema(updated_object: models.Model, payload: Schema):
 
     updated_object.full_clean()
     updated_object.save()
+
+
+def presigned_urls_prefilled(*relations: str):
+    """
+    Decorates a paginated list view so that the presigned urls of its items, and of
+    the given related storables, are resolved in one batch before serialization.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            prefill_presigned_urls(result["items"], relations)
+            return result
+
+        return wrapper
+
+    return decorator
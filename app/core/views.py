@@ -0,0 +1,84 @@
+from http import HTTPStatus
+from typing import List, Type
+from uuid import UUID
+
+from django.db.models import Model
+from django.http import HttpRequest
+from ninja import FilterSchema, Query, Router
+from ninja.pagination import paginate
+from ninja_crud import utils
+from ninja_crud.utils import merge_decorators
+from ninja_crud.views import ListModelView, RetrieveModelView
+
+from core.pagination import KeysetPagination
+from core.prefetch import apply_load_plan
+
+
+class KeysetListModelView(ListModelView):
+    """
+    ListModelView paginated with a cursor rather than an offset, see
+    KeysetPagination. Pages hold `items` and the `next_cursor` to request the
+    following one, which is null on the last page.
+
+    Rows are loaded along with what the output schema reads, see core.prefetch.
+    """
+
+    def register_collection_route(self, router: Router, model: Type[Model]) -> None:
+        model_name = utils.to_snake_case(model.__name__)
+        filter_schema = self.filter_schema
+
+        @router.get(
+            "/",
+            response={HTTPStatus.OK: List[self.output_schema]},
+            url_name=f"{model_name}s",
+            operation_id=f"list_{model_name}s",
+            summary=f"List {model.__name__}s",
+        )
+        @merge_decorators(self.decorators)
+        @paginate(KeysetPagination)
+        def list_models(
+            request: HttpRequest, filters: filter_schema = Query(default=FilterSchema())
+        ):
+            if self.get_queryset is not None:
+                queryset = self.get_queryset()
+            else:
+                queryset = model.objects.get_queryset()
+            queryset = apply_load_plan(queryset, self.output_schema)
+            return self.filter_queryset(queryset=queryset, filters=filters)
+
+    def register_instance_route(self, router: Router, model: Type[Model]) -> None:
+        parent_model_name = utils.to_snake_case(model.__name__)
+        model_name = utils.to_snake_case(self.related_model.__name__)
+        filter_schema = self.filter_schema
+
+        @router.get(
+            "/{id}/" + f"{model_name}s",
+            response={HTTPStatus.OK: List[self.output_schema]},
+            url_name=f"{parent_model_name}_{model_name}s",
+            operation_id=f"list_{parent_model_name}_{model_name}s",
+            summary=f"List {self.related_model.__name__}s of a {model.__name__}",
+        )
+        @merge_decorators(self.decorators)
+        @paginate(KeysetPagination)
+        def list_models(
+            request: HttpRequest,
+            id: UUID,
+            filters: filter_schema = Query(default=FilterSchema()),
+        ):
+            if self.get_queryset is not None:
+                queryset = self.get_queryset(id)
+            else:
+                queryset = self.related_model.objects.get_queryset()
+            queryset = apply_load_plan(queryset, self.output_schema)
+            return self.filter_queryset(queryset=queryset, filters=filters)
+
+
+class PlannedRetrieveModelView(RetrieveModelView):
+    """RetrieveModelView loading what the output schema reads, see core.prefetch"""
+
+    def register_route(self, router: Router, model: Type[Model]) -> None:
+        get_queryset = self.get_queryset or (lambda id: model.objects.get_queryset())
+        self.get_queryset = lambda id: apply_load_plan(
+            get_queryset(id), self.output_schema
+        )
+        super().register_route(router, model)
@@ -1,18 +1,18 @@
 from http import HTTPStatus
 
-from django.conf import settings
-from django.contrib.auth import authenticate
+from asgiref.sync import sync_to_async
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes, force_str
 from django.utils.html import strip_tags
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from ninja import Router
 
-from config.authentication import IDTokenBearer, JWTCoder
+from config.authentication import IDTokenBearer, JWTCoder, token_epochs
+from config.ratelimit import rate_limit
 from core.exceptions import IncoherentInput
 from core.schemas.common import ErrorOutput
+from userauth.hashing import password_hashing
 from userauth.models import Token, User
 from userauth.schemas import (
     AccessTokenOutput,
@@ -22,6 +22,7 @@ from userauth.schemas import (
     SignInInput,
     SignUpInput,
 )
+from userauth.tasks import send_emails
 
 router = Router()
 
@@ -33,12 +34,25 @@ router = Router()
     url_name="sign-in",
     operation_id="sign_in",
 )
-def sign_in(_, payload: SignInInput):
-    user: User = authenticate(**payload.dict())
-    if not user:
+@rate_limit("sign_in")
+async def sign_in(_, payload: SignInInput):
+    user: User = await User.objects.filter(username=payload.username).afirst()
+    if user is None:
+        # Hash anyway so that response times do not reveal which usernames exist
+        await password_hashing.make_password(payload.password)
         raise IncoherentInput(detail={"password": "Username or password incorrect."})
 
-    token, _ = Token.objects.get_or_create(user=user)
+    valid, upgraded_password = await password_hashing.check_password(
+        payload.password, user.password
+    )
+    if not valid or not user.is_active:
+        raise IncoherentInput(detail={"password": "Username or password incorrect."})
+
+    if upgraded_password is not None:
+        user.password = upgraded_password
+        await sync_to_async(user.save)(update_fields=["password"])
+
+    token, _ = await Token.objects.aget_or_create(user=user)
     return HTTPStatus.OK, IDTokenOutput(id_token=token.key)
 
 
@@ -49,12 +63,13 @@ def sign_in(_, payload: SignInInput):
     url_name="sign-up",
     operation_id="sign_up",
 )
-def sign_up(_, payload: SignUpInput):
-    user = User.objects.create_user(
+@rate_limit("sign_up")
+async def sign_up(_, payload: SignUpInput):
+    user = await User.objects.acreate_user(
         username=payload.username, email=payload.email, password=payload.password
     )
 
-    token, _ = Token.objects.get_or_create(user=user)
+    token, _ = await Token.objects.aget_or_create(user=user)
     return HTTPStatus.CREATED, IDTokenOutput(id_token=token.key)
 
 
@@ -67,7 +82,7 @@ def sign_up(_, payload: SignUpInput):
 )
 def refresh_access_token(request):
     id_token = request.user.auth_token.key
-    access_token = JWTCoder.encode(id_token)
+    access_token = JWTCoder.encode(id_token, user=request.user)
     if access_token is None:  # pragma: no cover
         raise IncoherentInput()
     return HTTPStatus.OK, AccessTokenOutput(access_token=access_token)
@@ -81,6 +96,7 @@ def refresh_access_token(request):
 )
 def rotate_id_token(request):
     request.user.auth_token.delete()
+    token_epochs.bump(request.user)
     token = Token.objects.create(user=request.user)
     return HTTPStatus.OK, IDTokenOutput(id_token=token.key)
 
@@ -93,6 +109,7 @@ def rotate_id_token(request):
 )
 def sign_out(request):
     request.user.auth_token.delete()
+    token_epochs.bump(request.user)
     return HTTPStatus.NO_CONTENT, None
 
 
@@ -103,6 +120,7 @@ def sign_out(request):
     url_name="reset-password",
     operation_id="reset_password",
 )
+@rate_limit("reset_password")
 def reset_password(_, payload: PasswordResetInput):
     try:
         user = User.objects.get(email__iexact=payload.email)
@@ -117,19 +135,20 @@ def reset_password(_, payload: PasswordResetInput):
     # Generate the password reset link URL
     password_reset_link_url = f"poukidex://reset-password/{uid}/{token}"
 
-    # Send the password reset email to the user
-    email_subject = "Reset your password"
+    # Queue the password reset email, a worker delivers it
     email_message = render_to_string(
         "password_reset_email.html",
         {"user": user, "password_reset_link_url": password_reset_link_url},
     )
-    plain_message = strip_tags(email_message)
-    send_mail(
-        subject=email_subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[payload.email],
-        html_message=email_message,
+    send_emails.delay(
+        [
+            {
+                "subject": "Reset your password",
+                "body": strip_tags(email_message),
+                "html_body": email_message,
+                "recipients": [payload.email],
+            }
+        ]
     )
     return HTTPStatus.NO_CONTENT, None
 
@@ -152,7 +171,7 @@ def confirm_reset_password(
 
     if user is not None and default_token_generator.check_token(user, token):
         user.set_password(payload.password)
-        user.save()
+        user.save(update_fields=["password", "updated_at"])
         return HTTPStatus.NO_CONTENT, None
     else:
         raise IncoherentInput(
@@ -1,8 +1,11 @@
 from http import HTTPStatus
 
 from ninja import Router
-from ninja_crud.views import ListModelView, ModelViewSet
+from ninja_crud.views import ModelViewSet
 
+from core.schemas.common import OrderableQuery
+from core.utils import presigned_urls_prefilled
+from core.views import KeysetListModelView
 from userauth.models import User
 from userauth.schemas import UserInput, UserOutput
 
@@ -13,7 +16,11 @@ class UserViewSet(ModelViewSet):
     model = User
     output_schema = UserOutput
 
-    list = ListModelView(output_schema=output_schema)
+    list = KeysetListModelView(
+        output_schema=output_schema,
+        filter_schema=OrderableQuery,
+        decorators=[presigned_urls_prefilled()],
+    )
 
 
 UserViewSet.register_routes(router)
@@ -36,10 +43,13 @@ def retrieve_my_user(request):
     operation_id="update_my_user",
 )
 def update_my_user(request, payload: UserInput):
-    user = request.user
-    for attr, value in payload.dict().items():
+    # request.user may come from the auth cache, saving it would write back every
+    # column as it was when cached
+    user = User.objects.get(pk=request.user.pk)
+    fields = payload.dict()
+    for attr, value in fields.items():
         setattr(user, attr, value)
 
     user.full_clean()
-    user.save()
+    user.save(update_fields=[*fields, "updated_at"])
     return HTTPStatus.OK, user
@@ -5,3 +5,8 @@ from django.utils.translation import gettext_lazy as _
 class AuthUserConfig(AppConfig):
     name = "userauth"
     verbose_name = _("User Auth")
+
+    def ready(self):
+        # Connects the receivers dropping users from the auth cache on writes, which
+        # workers and commands need as much as the API
+        from config import authentication  # noqa: F401
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from config.metrics import metrics
+from core.exceptions import ServiceUnavailableException
+
+
+class PasswordHashingPool:
+    """
+    Bounded executor running password hashing away from the request workers.
+
+    Calls beyond the worker count wait in a queue of `queue_size` slots; once it is
+    full they are rejected with a 503 instead of piling up behind a login storm.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int):
+        self.max_workers = max_workers
+        self.capacity = max_workers + queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hashing"
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _update_gauges(self):
+        metrics.gauge("password_hashing.pending", self._pending)
+        metrics.gauge(
+            "password_hashing.queued", max(0, self._pending - self.max_workers)
+        )
+
+    @staticmethod
+    def _timed(func: Callable, *args: Any) -> Any:
+        with metrics.timer("password_hashing.duration"):
+            return func(*args)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.capacity:
+                metrics.increment("password_hashing.rejected")
+                raise ServiceUnavailableException()
+            self._pending += 1
+            self._update_gauges()
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._update_gauges()
+
+    async def make_password(self, password: str) -> str:
+        return await self.run(make_password, password)
+
+    async def check_password(
+        self, password: str, encoded: str
+    ) -> tuple[bool, str | None]:
+        """
+        Returns whether the password matches, and its new hash when the hasher
+        settings changed since it was encoded.
+        """
+
+        def check() -> tuple[bool, str | None]:
+            upgraded = []
+            valid = check_password(
+                password, encoded, setter=lambda raw: upgraded.append(raw)
+            )
+            return valid, make_password(upgraded[0]) if upgraded else None
+
+        return await self.run(check)
+
+
+password_hashing = PasswordHashingPool(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    queue_size=settings.PASSWORD_HASHING_QUEUE_SIZE,
+)
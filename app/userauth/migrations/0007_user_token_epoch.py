@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("userauth", "0006_user_dominant_colors_alter_user_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="token_epoch",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userauth", "0007_user_token_epoch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="derivatives",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userauth", "0008_user_derivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="perceptual_hash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:26
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userauth", "0009_user_perceptual_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="dominant_lab",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(), blank=True, null=True, size=3
+            ),
+        ),
+    ]
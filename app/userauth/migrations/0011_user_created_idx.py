@@ -0,0 +1,20 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:35
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking writes, which cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ("userauth", "0010_user_dominant_lab"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(fields=["created_at", "id"], name="user_created_idx"),
+        ),
+    ]
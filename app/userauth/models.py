@@ -3,24 +3,33 @@ from __future__ import annotations
 import binascii
 import os
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from core.models.common import Identifiable, Storable, Traceable
+from userauth.hashing import password_hashing
 
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
 
     def _create_user(
-        self, username: str, password: str, **extra_fields
+        self,
+        username: str,
+        password: str | None,
+        encoded_password: str | None = None,
+        **extra_fields,
     ) -> AbstractUser:
         if not username:
             raise ValueError("The given username must be set")
 
         user: AbstractUser = self.model(username=username, **extra_fields)
-        user.set_password(password)
+        if encoded_password is None:
+            user.set_password(password)
+        else:
+            user.password = encoded_password
         user.full_clean()
         user.save(using=self._db)
         return user
@@ -31,6 +40,18 @@ class UserManager(BaseUserManager):
 
         return self._create_user(username, password, **extra_fields)
 
+    async def acreate_user(
+        self, username: str, password: str, **extra_fields
+    ) -> AbstractUser:
+        """Same as create_user, hashing the password on the password hashing pool"""
+        extra_fields.setdefault("is_staff", False)
+        extra_fields.setdefault("is_superuser", False)
+
+        encoded_password = await password_hashing.make_password(password)
+        return await sync_to_async(self._create_user)(
+            username, None, encoded_password=encoded_password, **extra_fields
+        )
+
     def create_superuser(self, username, password, **extra_fields):
         extra_fields.setdefault("is_staff", True)
         extra_fields.setdefault("is_superuser", True)
@@ -51,6 +72,8 @@ class User(AbstractUser, Identifiable, Storable, Traceable):
             "unique": _("A user with that email already exists."),
         },
     )
+    # Bumped to revoke every stateless access token issued to this user
+    token_epoch = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["email"]
@@ -67,6 +90,10 @@ class User(AbstractUser, Identifiable, Storable, Traceable):
         else:
             return f"{self.username}"
 
+    class Meta(AbstractUser.Meta):
+        # Keyset pagination, see core.pagination
+        indexes = [models.Index(fields=["created_at", "id"], name="user_created_idx")]
+
 
 class Token(models.Model):
     """
@@ -0,0 +1,77 @@
+import logging
+import threading
+from smtplib import SMTPException, SMTPServerDisconnected
+
+from celery import shared_task
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class PooledMailConnection:
+    """
+    SMTP connection of the worker process, opened on first use and kept open across
+    tasks so that each batch of e-mails skips the TLS handshake.
+    """
+
+    def __init__(self):
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def send(self, messages: list[EmailMultiAlternatives]) -> int:
+        with self._lock:
+            for attempt in range(2):
+                if self._connection is None:
+                    self._connection = get_connection(fail_silently=False)
+                    self._connection.open()
+                try:
+                    return self._connection.send_messages(messages)
+                except SMTPServerDisconnected:
+                    # The server dropped the idle connection, reconnect once
+                    self._close()
+                    if attempt:
+                        raise
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+mail_connection = PooledMailConnection()
+
+
+@worker_process_shutdown.connect
+def close_mail_connection(**kwargs):
+    mail_connection.close()
+
+
+@shared_task(autoretry_for=(SMTPException,), retry_backoff=True, max_retries=3)
+def send_emails(messages: list[dict]) -> int:
+    """
+    Sends a batch of e-mails, each given as a dict with `subject`, `body`,
+    `recipients` and an optional `html_body`.
+    """
+    emails = []
+    for message in messages:
+        email = EmailMultiAlternatives(
+            subject=message["subject"],
+            body=message["body"],
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=message["recipients"],
+        )
+        if message.get("html_body"):
+            email.attach_alternative(message["html_body"], "text/html")
+        emails.append(email)
+
+    sent = mail_connection.send(emails)
+    logger.info(f"Sent {sent} of {len(emails)} e-mails")
+    return sent
@@ -1,10 +1,18 @@
 from http import HTTPStatus
+from unittest.mock import patch
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.test import override_settings
 from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
 
 from config.authentication import JWTCoder
+from config.metrics import metrics
 from core.tests.base import BaseTest
+from userauth.hashing import password_hashing
 from userauth.models import Token, User
 
 
@@ -57,6 +65,26 @@ class TestAuth(BaseTest):
             self.user_one.username, "bad_password", HTTPStatus.BAD_REQUEST
         )
 
+    def test_signin_password_hashing_saturated(self):
+        with patch.object(password_hashing, "capacity", 0):
+            self._do_test_signin(
+                self.user_one.username,
+                self.user_one_pwd,
+                HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+
+    @override_settings(RATE_LIMITS={"sign_in": (1, 60)})
+    def test_signin_rate_limited(self):
+        self._do_test_signin(
+            self.user_one.username, self.user_one_pwd, HTTPStatus.OK, self.user_one
+        )
+        with self.assertNumQueries(0):
+            self._do_test_signin(
+                self.user_one.username,
+                self.user_one_pwd,
+                HTTPStatus.TOO_MANY_REQUESTS,
+            )
+
     def test_refresh_access_token(self):
         self._do_test_signin(
             self.user_one.username, self.user_one_pwd, HTTPStatus.OK, self.user_one
@@ -64,7 +92,7 @@ class TestAuth(BaseTest):
         kwargs = {}
         response = self.client.post(
             reverse("api:refresh-access-token", kwargs=kwargs),
-            **BaseTest._generate_auth_user_by_token(self.token_one)
+            **BaseTest._generate_auth_user_by_token(self.token_one),
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
@@ -80,7 +108,7 @@ class TestAuth(BaseTest):
         kwargs = {}
         response = self.client.post(
             reverse("api:rotate-id-token", kwargs=kwargs),
-            **self._generate_auth_user(self.token_one)
+            **self._generate_auth_user(self.token_one),
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
@@ -102,6 +130,63 @@ class TestAuth(BaseTest):
 
         self.assertFalse(Token.objects.filter(user=self.user_one).exists())
 
+        response = self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_access_token_verified_once(self):
+        access_token = JWTCoder.encode(self.token_one.key)
+        # Tokens encoded within the same second by other tests are identical
+        JWTCoder.verified_tokens.clear()
+        hits = metrics.counter("jwt_cache.hit")
+
+        self.assertEqual(JWTCoder.decode(access_token), self.token_one.key)
+        self.assertEqual(JWTCoder.decode(access_token), self.token_one.key)
+        self.assertEqual(metrics.counter("jwt_cache.hit"), hits + 1)
+
+    def test_metrics_forbidden(self):
+        response = self.client.get(reverse("api:metrics"), **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+        User.objects.filter(id=self.user_two.id).update(is_staff=True)
+        response = self.client.get(reverse("api:metrics"), **self.auth_user_two)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn("jwt_cache.hit", response.json()["counters"])
+
+    @override_settings(JWT_STATELESS=True)
+    def test_stateless_access_token(self):
+        access_token = JWTCoder.encode(self.token_one.key, user=self.user_one)
+        claims = JWTCoder.decode_claims(access_token)
+        self.assertEqual(claims["sub"], str(self.user_one.id))
+        self.assertEqual(claims["epoch"], 0)
+
+        auth_user = {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}
+        self.client.get(reverse("api:my_user"), **auth_user)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("api:my_user"), **auth_user)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()["id"], str(self.user_one.id))
+
+    @override_settings(JWT_STATELESS=True)
+    def test_stateless_access_token_revoked_on_signout(self):
+        access_token = JWTCoder.encode(self.token_one.key, user=self.user_one)
+        auth_user = {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}
+        response = self.client.post(reverse("api:sign-out"), **auth_user)
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+
+        response = self.client.get(reverse("api:my_user"), **auth_user)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    @override_settings(JWT_STATELESS=True)
+    def test_stateless_access_token_of_deleted_user(self):
+        access_token = JWTCoder.encode(self.token_one.key, user=self.user_one)
+        auth_user = {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}
+        # Caches the epoch
+        self.client.get(reverse("api:my_user"), **auth_user)
+        User.objects.filter(pk=self.user_one.pk).delete()
+
+        response = self.client.get(reverse("api:my_user"), **auth_user)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
     def _do_test_signup(
         self,
         username: str,
@@ -123,7 +208,7 @@ class TestAuth(BaseTest):
             reverse("api:sign-up", kwargs=kwargs),
             data=data,
             content_type="application/json",
-            **self.auth_user_one
+            **self.auth_user_one,
         )
         self.assertEqual(response.status_code, expected_status)
 
@@ -154,3 +239,60 @@ class TestAuth(BaseTest):
 
     def test_signup_conflict_bad_email(self):
         self._do_test_signup("cool_name", "malformatedemail", HTTPStatus.BAD_REQUEST)
+
+    def test_access_token_of_deleted_user(self):
+        # Caches the user
+        self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        self.user_one.delete()
+
+        response = self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_confirm_reset_password(self):
+        self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        response = self.client.post(
+            reverse(
+                "api:confirm-reset-password",
+                kwargs={
+                    "user_id": urlsafe_base64_encode(force_bytes(self.user_one.pk)),
+                    "token": default_token_generator.make_token(self.user_one),
+                },
+            ),
+            data={"password": "new-password", "password_confirmation": "new-password"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertTrue(
+            User.objects.get(pk=self.user_one.pk).check_password("new-password")
+        )
+
+        # Saving the user from the cache would bring the former password back
+        self.client.put(
+            reverse("api:my_user"),
+            data={"username": "adupont", "first_name": "a", "last_name": "d"},
+            content_type="application/json",
+            **self.auth_user_one,
+        )
+        self.assertTrue(
+            User.objects.get(pk=self.user_one.pk).check_password("new-password")
+        )
+
+    def _do_test_reset_password(self, email: str, expected_status: int):
+        response = self.client.post(
+            reverse("api:reset-password"),
+            data={"email": email},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, expected_status)
+
+    def test_reset_password(self):
+        self._do_test_reset_password(self.user_one.email, HTTPStatus.NO_CONTENT)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user_one.email])
+        html_body, _ = mail.outbox[0].alternatives[0]
+        self.assertIn("poukidex://reset-password/", html_body)
+
+    def test_reset_password_unknown_email(self):
+        self._do_test_reset_password("unknown@email.com", HTTPStatus.BAD_REQUEST)
+        self.assertEqual(len(mail.outbox), 0)
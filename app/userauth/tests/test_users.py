@@ -5,9 +5,9 @@ from typing import Union
 
 from django.test import TestCase
 from django.urls import reverse
-from ninja_crud.tests import Credentials, ListModelViewTest, ModelViewSetTest
+from ninja_crud.tests import Credentials, ModelViewSetTest
 
-from core.tests.base import BaseTest
+from core.tests.base import BaseTest, KeysetListModelViewTest
 from userauth.api.users import UserViewSet
 from userauth.models import User
 from userauth.schemas import UserOutput
@@ -26,11 +26,18 @@ class UserViewSetTest(ModelViewSetTest, BaseTest):
     def get_credentials_ok(self: Union[UserViewSetTest, TestCase]):
         return Credentials(ok=self.auth_user_one)
 
-    test_list = ListModelViewTest(
+    test_list = KeysetListModelViewTest(
         instance_getter=get_instance,
         credentials_getter=get_credentials_ok,
     )
 
+    def test_list_users_order_by_unknown_field(self):
+        response = self.client.get(
+            "/api/users/", {"order_by": "name"}, **self.auth_user_one
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn("order_by", response.json()["detail"])
+
     def test_get_my_user(self):
         response = self.client.get(reverse("api:my_user"), **self.auth_user_one)
         self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -42,6 +49,12 @@ class UserViewSetTest(ModelViewSetTest, BaseTest):
             UserOutput.from_orm(user),
         )
 
+    def test_get_my_user_cached(self):
+        self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
     def test_update_my_user(self):
         data = {
             "object_name": "object_name",
@@ -63,3 +76,37 @@ class UserViewSetTest(ModelViewSetTest, BaseTest):
             content,
             UserOutput.from_orm(user),
         )
+
+    def test_update_my_user_invalidates_cache(self):
+        self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        data = {"username": "adupont", "first_name": "antoine", "last_name": "dupont"}
+        self.client.put(
+            reverse("api:my_user"),
+            data=data,
+            content_type="application/json",
+            **self.auth_user_one,
+        )
+
+        response = self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()["username"], "adupont")
+
+    def test_update_my_user_keeps_columns_written_since_cached(self):
+        self.client.get(reverse("api:my_user"), **self.auth_user_one)
+        User.objects.filter(pk=self.user_one.pk).update(
+            first_name="changed", is_staff=True
+        )
+        self.client.put(
+            reverse("api:my_user"),
+            data={
+                "username": "adupont",
+                "first_name": "antoine",
+                "last_name": "dupont",
+            },
+            content_type="application/json",
+            **self.auth_user_one,
+        )
+
+        user = User.objects.get(pk=self.user_one.pk)
+        self.assertEqual((user.username, user.first_name), ("adupont", "antoine"))
+        self.assertTrue(user.is_staff)